@@ -4,66 +4,228 @@ Command-line interface for AtPoE (Admitting the Possibilities of Error).
 """
 
 import argparse
+import random
 import sys
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 
-from atpoe.core.curve_generator import generate_nested_curve, generate_initial_circle
+from atpoe.core.cache import DEFAULT_CACHE_DIR, CurveCache, resume_curves, run_params
+from atpoe.core.contour import iter_contour_curves
+from atpoe.core.curve import Curve
+from atpoe.core.curve_generator import COLORS, generate_initial_circle, generate_nested_curve, iter_nested_curves
+from atpoe.core.validation import find_self_intersections
+from atpoe.graphics.render import CurveCanvas, draw_closed_curve
+from atpoe.graphics.tiled import render_tiled
 from PIL import Image, ImageDraw
 
+# Engine that walks each curve inside the one before it
+PYTHON_ENGINE = 'python'
 
-def create_curves(
+# Engine that extracts every curve at once as distance-field contours
+CONTOUR_ENGINE = 'contour'
+
+# Curve generators selectable with --engine
+ENGINES = (PYTHON_ENGINE, CONTOUR_ENGINE)
+
+
+# Radius of the initial circle
+RADIUS = 450
+
+# Colors cycled over the bands between curves with --fill
+FILL_COLORS = ['lightgray', 'lightblue', 'wheat', 'honeydew', 'lavender', 'mistyrose']
+
+
+def generate_curves(
     num_curves: int, 
     segment_length: int, 
     error: float, 
     inter_curve_distance: int, 
     canvas_size: int = 1000, 
-    output_file: Optional[str] = None
-) -> List[List[Tuple[float, float]]]:
-    """Generate and save curves using command line parameters."""
+    engine: str = PYTHON_ENGINE,
+    validate: bool = False,
+    seed: Optional[int] = None,
+    cache: Optional[CurveCache] = None
+) -> Iterator[Curve]:
+    """Yield curves one at a time, as Curve objects, using command line parameters.
     
-    # Initialize
-    image = Image.new('RGB', (canvas_size, canvas_size), 'white')
-    draw = ImageDraw.Draw(image)
+    ``engine`` selects the nested curve generator: 'python' walks each curve
+    inside the one before it; 'contour' extracts all curves as contours of
+    the outer circle's distance field (see atpoe.core.contour), one per
+    level, and does not use the cache.
     
-    # Generate curves
-    curves = []
-    colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink', 'gray', 'cyan']
+    With ``validate``, a nested curve that crosses itself is rejected and
+    generation stops there, since every later curve would inherit the fault.
     
-    for i in range(num_curves):
-        if i == 0:
-            curve = generate_initial_circle(canvas_size, 450, segment_length)
-        else:
-            curve = generate_nested_curve(curves[-1], inter_curve_distance, error, segment_length)
+    With ``seed``, errors are drawn from a private random.Random(seed), so a
+    run is reproducible on any machine and independent of other users of the
+    global random module.
+    
+    With ``cache`` (and a seed), curves of a run generated before are read
+    back from the cache instead of being generated again, and a longer run
+    only generates the curves past the cached ones.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}' (choose from {', '.join(ENGINES)})")
+    
+    rng = random.Random(seed) if seed is not None else None
+    
+    if engine == CONTOUR_ENGINE:
+        curves = iter_contour_curves(
+            num_curves, inter_curve_distance, error, segment_length,
+            canvas_size=canvas_size, radius=RADIUS, rng=rng
+        )
+    elif cache is not None and seed is not None:
+        run = run_params(generate_nested_curve, canvas_size, RADIUS, segment_length,
+                         inter_curve_distance, error, seed)
+        curves = resume_curves(
+            cache, run, num_curves,
+            lambda: generate_initial_circle(canvas_size, RADIUS, segment_length),
+            lambda curve, rng: generate_nested_curve(curve, inter_curve_distance, error, segment_length, rng=rng),
+            rng
+        )
+    else:
+        curves = iter_nested_curves(
+            num_curves, inter_curve_distance, error, segment_length,
+            canvas_size=canvas_size, radius=RADIUS, rng=rng
+        )
+    
+    for i, curve in enumerate(curves):
+        if validate and i > 0:
+            crossings = find_self_intersections(curve)
+            if crossings:
+                print(f"Rejected curve {i+1}: crosses itself at {len(crossings)} segment pairs")
+                return
+        
+        curve = Curve(curve)
         
-        curves.append(curve)
         print(f"Generated curve {i+1} ({len(curve)} segments)")
         
         # Debug: print first few points of each curve
         if len(curve) > 0:
             print(f"  Curve {i+1} starts at: {curve[0]}")
             print(f"  Curve {i+1} ends at: {curve[-1]}")
-    
-    # Draw curves with different colors
-    for i, curve in enumerate(curves):
-        color = colors[i % len(colors)]
-        for j in range(len(curve)):
-            p1 = curve[j]
-            p2 = curve[(j + 1) % len(curve)]
-            draw.line([p1, p2], fill=color, width=2)
-    
-    # Save or display
+        
+        yield curve
+
+
+def draw_curve(draw: ImageDraw.ImageDraw, curve: List[Tuple[float, float]], color: str) -> None:
+    """Draw one closed curve as a single polyline."""
+    draw_closed_curve(draw, curve, color, width=2)
+
+
+def save_image(image: Image.Image, output_file: Optional[str]) -> None:
+    """Save the image, or show it when no output file is given."""
     if output_file:
         image.save(output_file)
         print(f"Saved curves to: {output_file}")
     else:
         image.show()
+
+
+def create_curves(
+    num_curves: int, 
+    segment_length: int, 
+    error: float, 
+    inter_curve_distance: int, 
+    canvas_size: int = 1000, 
+    output_file: Optional[str] = None,
+    engine: str = PYTHON_ENGINE,
+    validate: bool = False,
+    seed: Optional[int] = None,
+    antialias: bool = False,
+    cache: Optional[CurveCache] = None,
+    fill_colors: Optional[List[str]] = None,
+    tile_size: Optional[int] = None
+) -> List[Curve]:
+    """Generate and save curves using command line parameters.
+    
+    All curves are kept and returned; see stream_curves for a bounded-memory
+    alternative. ``engine``, ``validate``, ``seed`` and ``cache`` are as for
+    generate_curves; ``antialias`` draws supersampled, anti-aliased lines.
+    With ``fill_colors``, the bands between curves are filled with them in
+    one pass before the curves are drawn. With ``tile_size``, the PNG is
+    rendered and written tile by tile (see atpoe.graphics.tiled), so the
+    canvas is never held in memory whole.
+    """
+    if tile_size and not output_file:
+        raise ValueError("tiled rendering needs an output file")
+    
+    # Generate curves
+    curves = list(generate_curves(
+        num_curves, segment_length, error, inter_curve_distance,
+        canvas_size, engine, validate, seed, cache
+    ))
+    
+    if tile_size:
+        render_tiled(curves, canvas_size, output_file, COLORS, width=2, antialias=antialias,
+                     fill_colors=fill_colors, tile_size=tile_size)
+        print(f"Saved curves to: {output_file}")
+        return curves
+    
+    # Initialize
+    canvas = CurveCanvas(canvas_size, 'white', antialias)
+    
+    # Draw curves with different colors, over their filled bands
+    if fill_colors:
+        canvas.fill_bands(curves, fill_colors)
+    canvas.draw_curves(curves, COLORS, width=2)
+    
+    # Save or display
+    save_image(canvas.image(), output_file)
     
     return curves
 
 
+def stream_curves(
+    num_curves: int, 
+    segment_length: int, 
+    error: float, 
+    inter_curve_distance: int, 
+    canvas_size: int = 1000, 
+    output_file: Optional[str] = None,
+    engine: str = PYTHON_ENGINE,
+    validate: bool = False,
+    seed: Optional[int] = None,
+    antialias: bool = False,
+    cache: Optional[CurveCache] = None,
+    fill_colors: Optional[List[str]] = None
+) -> int:
+    """Generate curves and draw each one as it arrives, then discard it.
+    
+    Only the curve needed to generate the next one is kept in memory, so
+    memory does not grow with ``num_curves``. Returns the number of curves
+    drawn. Other arguments are as for create_curves; with ``fill_colors``
+    each curve's inside is filled before it is drawn, which paints the
+    band it starts over the inside of the curve before it.
+    """
+    canvas = CurveCanvas(canvas_size, 'white', antialias)
+    
+    count = 0
+    for i, curve in enumerate(generate_curves(
+        num_curves, segment_length, error, inter_curve_distance,
+        canvas_size, engine, validate, seed, cache
+    )):
+        if fill_colors:
+            canvas.fill_curve(curve, fill_colors[i % len(fill_colors)])
+        canvas.draw_curve(curve, COLORS[i % len(COLORS)], width=2)
+        count += 1
+    
+    save_image(canvas.image(), output_file)
+    
+    return count
+
+
 def main() -> None:
     """Main CLI function."""
+    if sys.argv[1:2] == ['sweep']:
+        from atpoe.sweep import main as sweep_main
+        sweep_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['deposit']:
+        from atpoe.core.deposition import main as deposit_main
+        deposit_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="AtPoE - Admitting the Possibilities of Error",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -71,6 +233,8 @@ def main() -> None:
 Examples:
   atpoe --curves 10 --segment-length 15 --error 1.5 --distance 6
   atpoe --curves 20 --segment-length 10 --error 2.4 --distance 8 --output my_curves.png
+  atpoe sweep --dist 3 5 8 --error 0.5 1.0 --seed 0 1   (see atpoe sweep --help)
+  atpoe deposit --layers 160 --output deposition.png   (see atpoe deposit --help)
         """
     )
     
@@ -109,6 +273,63 @@ Examples:
         help='Canvas size in pixels (default: 1000)'
     )
     
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default=PYTHON_ENGINE,
+        help='Nested curve generator: pure Python or distance-field '
+             'contours that follow non-convex shapes; contour yields the largest loop at '
+             'each level, at most --curves curves, and stops at the first empty level; '
+             'it needs --error at most half of --distance (default: python)'
+    )
+    
+    parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='Reject self-intersecting curves and stop at the first one'
+    )
+    
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='Random seed for reproducible curves (default: unseeded)'
+    )
+    
+    parser.add_argument(
+        '--antialias',
+        action='store_true',
+        help='Draw anti-aliased lines (supersampled, slower)'
+    )
+    
+    parser.add_argument(
+        '--fill',
+        nargs='*',
+        metavar='COLOR',
+        help='Fill the bands between curves, cycling these colors '
+             f'(default without colors: {" ".join(FILL_COLORS)})'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        nargs='?',
+        const=str(DEFAULT_CACHE_DIR),
+        metavar='DIR',
+        help=f'Reuse curves of earlier seeded runs from a cache; needs --seed (default directory: {DEFAULT_CACHE_DIR})'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Draw each curve as it is generated and discard it (bounded memory)'
+    )
+    
+    parser.add_argument(
+        '--tile-size',
+        type=int,
+        metavar='PIXELS',
+        help='Render and write the PNG in tiles of this size, for canvases too large for memory'
+    )
+    
     parser.add_argument(
         '--output', '-o',
         type=str,
@@ -122,18 +343,34 @@ Examples:
     )
     
     args = parser.parse_args()
+    if args.tile_size and args.stream:
+        parser.error('--tile-size and --stream cannot be combined')
+    if args.cache and args.seed is None:
+        parser.error('--cache needs --seed: only seeded runs are cached')
+    if args.cache and args.engine == CONTOUR_ENGINE:
+        parser.error('--cache cannot be combined with --engine contour')
     
     # Generate curves with CLI parameters
     try:
-        curves = create_curves(
+        options = (
             args.curves,
             args.segment_length,
             args.error,
             args.distance,
             args.canvas_size,
-            args.output
+            args.output,
+            args.engine,
+            args.validate,
+            args.seed,
+            args.antialias,
+            CurveCache(args.cache) if args.cache else None,
+            (args.fill or FILL_COLORS) if args.fill is not None else None
         )
-        print(f"Successfully generated {len(curves)} curves!")
+        if args.stream:
+            count = stream_curves(*options)
+        else:
+            count = len(create_curves(*options, tile_size=args.tile_size))
+        print(f"Successfully generated {count} curves!")
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
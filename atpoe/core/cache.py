@@ -0,0 +1,250 @@
+"""
+atpoe/core/cache.py - Content-addressed on-disk cache for curve runs
+
+This module keeps generated curves and rendered images between runs:
+- CurveCache: Size-bounded LRU file cache of curves and image bytes
+- run_params: The parameters that determine a seeded run's curves
+- resume_curves: Yield a run's curves, resuming from the deepest cached prefix
+
+Every entry is stored under the SHA-256 of a canonical JSON description
+of what produced it: the generator (its qualified name and
+GENERATOR_VERSION), canvas_size, radius, segment_length, distance, error,
+seed and curve index for curves, plus the drawing style for images. Equal
+parameters always map to the same file and any change maps to a new one,
+so entries never need invalidating; bump GENERATOR_VERSION when a
+generator's output changes.
+
+Curve k of a run depends only on curve k - 1 and the RNG state, so each
+curve is stored with a checkpoint of the RNG state after it was drawn. A
+run of 60 curves with the same parameters as an earlier 40-curve run
+reads the first 40 curves back, restores the RNG and generates only the
+last 20.
+
+Reading an entry refreshes its modification time. When the cache grows
+past ``max_bytes`` the least recently used entries are deleted first.
+Only seeded runs are cached, since unseeded runs are not reproducible.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Bump when generated curves change for the same parameters
+GENERATOR_VERSION = 2
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('ATPOE_CACHE_DIR', Path.home() / '.cache' / 'atpoe'))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def run_params(nested_curve, canvas_size, radius, segment_length, distance, error, seed,
+               outer_curve=None):
+    """Return the dict of parameters that determine a seeded run's curves.
+
+    When the run starts from a given ``outer_curve`` instead of the
+    generated circle, a hash of its coordinates replaces the radius.
+    """
+    params = {
+        'generator': f"{nested_curve.__module__}.{nested_curve.__qualname__}",
+        'version': GENERATOR_VERSION,
+        'canvas_size': canvas_size,
+        'radius': radius,
+        'segment_length': segment_length,
+        'distance': distance,
+        'error': error,
+        'seed': seed,
+    }
+    if outer_curve is not None:
+        points = np.ascontiguousarray(np.asarray(outer_curve, dtype='<f8'))
+        params['radius'] = None
+        params['outer'] = hashlib.sha256(points.tobytes()).hexdigest()
+    return params
+
+
+class CurveCache:
+    """Content-addressed file cache with least-recently-used eviction."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self._entries())
+
+    @staticmethod
+    def key(kind, **fields):
+        """Return the hex digest addressing an entry of ``kind``."""
+        description = json.dumps({'kind': kind, **fields}, sort_keys=True, default=str)
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def curve_key(self, run, index):
+        """Key of curve ``index`` (0 is the outer curve) of a run."""
+        return self.key('curve', run=run, index=index)
+
+    def state_key(self, run, index):
+        """Key of the RNG state checkpoint taken after curve ``index`` of a run."""
+        return self.key('rng', run=run, index=index)
+
+    def image_key(self, run, num_curves, style):
+        """Key of a rendered image of a run's first ``num_curves`` curves."""
+        return self.key('image', run=run, num_curves=num_curves, style=style)
+
+    def _path(self, key, suffix):
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _entries(self):
+        return (path for path in self.root.glob('??/*') if path.is_file())
+
+    def _read(self, key, suffix, read):
+        path = self._path(key, suffix)
+        try:
+            value = read(path)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        return value
+
+    def _write(self, key, suffix, write):
+        path = self._path(key, suffix)
+        path.parent.mkdir(exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        self._size += path.stat().st_size - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def has_curve(self, key):
+        return self._path(key, '.npy').exists()
+
+    def get_curve(self, key):
+        """Return the cached curve as an (N, 2) float64 array, or None."""
+        return self._read(key, '.npy', lambda path: np.load(path, allow_pickle=False))
+
+    def put_curve(self, key, curve):
+        array = np.asarray(curve, dtype=float).reshape(-1, 2)
+        self._write(key, '.npy', lambda f: np.save(f, array, allow_pickle=False))
+
+    def has_bytes(self, key):
+        return self._path(key, '.bin').exists()
+
+    def get_bytes(self, key):
+        """Return cached bytes (e.g. an encoded image), or None."""
+        return self._read(key, '.bin', Path.read_bytes)
+
+    def put_bytes(self, key, data):
+        self._write(key, '.bin', lambda f: f.write(data))
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if self._size <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+    def clear(self):
+        """Delete every entry."""
+        self.evict(0)
+
+    @property
+    def size(self):
+        """Approximate total size of the entries in bytes."""
+        return self._size
+
+
+def _rng_state(rng):
+    """Return a JSON-serializable snapshot of a random.Random or numpy Generator."""
+    if isinstance(rng, np.random.Generator):
+        return {'numpy': rng.bit_generator.state}
+    version, internal, gauss_next = rng.getstate()
+    return {'random': [version, list(internal), gauss_next]}
+
+
+def _set_rng_state(rng, state):
+    """Restore a snapshot taken by _rng_state."""
+    if 'numpy' in state:
+        rng.bit_generator.state = state['numpy']
+    else:
+        version, internal, gauss_next = state['random']
+        rng.setstate((version, tuple(internal), gauss_next))
+
+
+def _cached_prefix(cache, curve_keys, state_keys):
+    """Return (depth, state): the deepest k with curves 0..k and state k cached."""
+    depth = -1
+    for curve_key, state_key in zip(curve_keys, state_keys):
+        if not cache.has_curve(curve_key):
+            break
+        depth += 1
+
+    # The checkpoint of the last curve may be missing (e.g. evicted)
+    while depth >= 0:
+        data = cache.get_bytes(state_keys[depth])
+        if data is not None:
+            return depth, json.loads(data)
+        depth -= 1
+    return -1, None
+
+
+def resume_curves(cache, run, num_curves, first_curve, next_curve, rng):
+    """Yield a run's first ``num_curves`` curves, resuming from the cache.
+
+    ``first_curve()`` returns curve 0 and ``next_curve(curve, rng)`` the
+    curve inside ``curve`` (None to stop). ``rng`` must be freshly seeded
+    with the run's seed. Curves 0..k of the deepest cached prefix are read
+    back, the RNG is restored to its state after curve k and only the rest
+    are generated; every generated curve is stored with its checkpoint.
+    Cached curves are yielded as lists of (x, y) tuples.
+    """
+    curve_keys = [cache.curve_key(run, index) for index in range(num_curves)]
+    state_keys = [cache.state_key(run, index) for index in range(num_curves)]
+    depth, state = _cached_prefix(cache, curve_keys, state_keys)
+
+    done = 0
+    curve = None
+    for key in curve_keys[:depth + 1]:
+        cached = cache.get_curve(key)
+        if cached is None:
+            break
+        curve = list(map(tuple, cached.tolist()))
+        yield curve
+        done += 1
+
+    if depth >= 0 and done == depth + 1:
+        _set_rng_state(rng, state)
+        start = done
+    else:
+        # Evicted while reading: regenerate from the start with the fresh
+        # rng, which reproduces the curves already yielded
+        start = 0
+
+    for index in range(start, num_curves):
+        curve = first_curve() if index == 0 else next_curve(curve, rng)
+        if curve is None or len(curve) == 0:
+            return
+        cache.put_curve(curve_keys[index], curve)
+        cache.put_bytes(state_keys[index], json.dumps(_rng_state(rng)).encode('utf-8'))
+        if index >= done:
+            yield curve
@@ -0,0 +1,407 @@
+"""
+atpoe/core/contour.py - Nested curves as iso-contours of a distance field
+
+This module extracts every nested curve from one distance field:
+- lower_envelope: Lower envelope of parabolas along every row at once
+- curve_distance: Distance from each grid node to a closed curve
+- smooth_noise: Smooth value noise on a grid
+- marching_squares: Closed iso-contours of a field at many levels in one pass
+- iter_contour_curves: Yields the outer curve and the contours inside it
+
+The distance from every node of a grid around the outer curve to the
+curve is computed once, with the two-pass algorithm of Felzenszwalb and
+Huttenlocher: distances to the curve's crossings along each column line,
+then the lower envelope of parabolas along rows, and the same with rows
+and columns swapped. The envelope is found for all rows at once as a
+lower convex hull, pruned in a few vectorized rounds, so neither pass
+loops over the grid in Python. Curve k is the iso-contour at distance
+k * length, so the curves follow the outer shape however non-convex it
+is, instead of heading for a centroid.
+
+The error is one smooth noise field added to the distances. Each curve
+is a contour of the same field, so it never crosses its neighbours
+whatever the noise, and the noise a curve meets is correlated with what
+the curve outside it met nearby, as when following a line by hand.
+
+Every cell of the field is classified against all levels at once, and
+since the levels are evenly spaced, which levels a cell crosses is
+arithmetic on its corner values. 100 curves cost one distance field,
+one noise field and one vectorized marching squares pass; each segment
+finds its successor by index in the neighbouring cell, and a few rounds
+of pointer jumping link the segments into loops, instead of 100
+sequential walks.
+"""
+
+import random
+
+import numpy as np
+
+from atpoe.core.curve_generator import generate_initial_circle
+from atpoe.core.resample import resample_loops
+
+# Segments crossed by the contour in each marching squares case, as pairs
+# of cell edges (0 top, 1 right, 2 bottom, 3 left). Corner bits: 1 top-left,
+# 2 top-right, 4 bottom-right, 8 bottom-left, set where field >= level.
+# Saddles 5 and 10 are listed for a centre below the level; see _SADDLES.
+_CASE_EDGES = {
+    1: [(0, 3)], 2: [(0, 1)], 3: [(3, 1)], 4: [(1, 2)],
+    5: [(0, 3), (1, 2)], 6: [(0, 2)], 7: [(3, 2)], 8: [(2, 3)],
+    9: [(0, 2)], 10: [(0, 1), (2, 3)], 11: [(1, 2)], 12: [(3, 1)],
+    13: [(0, 1)], 14: [(0, 3)],
+}
+# Saddle segments when the cell centre is at or above the level
+_SADDLES = {5: [(0, 1), (2, 3)], 10: [(0, 3), (1, 2)]}
+
+# Largest error, as a fraction of ``length``, for which the first curve
+# stays inside the outer one
+MAX_ERROR_FRACTION = 0.5
+
+
+def _edge_table():
+    """Return (first, second) arrays indexed by [case, centre_above, slot].
+
+    Each segment runs from its first edge to its second with the region
+    above the level on its left, so around a contour every segment ends
+    on the edge where the next one starts.
+    """
+    middles = np.array([(0.5, 0.0), (1.0, 0.5), (0.5, 1.0), (0.0, 0.5)])
+    corners = np.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+    first = np.zeros((16, 2, 2), dtype=np.intp)
+    second = np.zeros((16, 2, 2), dtype=np.intp)
+    for case, segments in _CASE_EDGES.items():
+        for centre in (0, 1):
+            chosen = _SADDLES[case] if centre and case in _SADDLES else segments
+            for slot, (a, b) in enumerate(chosen):
+                # Corner cut off by the segment: shared by adjacent edges,
+                # else the top-left one
+                corner = (a + 1) % 4 if b == (a + 1) % 4 else a if b == (a + 3) % 4 else 0
+                direction = middles[b] - middles[a]
+                offset = corners[corner] - middles[a]
+                left = direction[0] * offset[1] - direction[1] * offset[0] < 0
+                if left != bool(case >> corner & 1):
+                    a, b = b, a
+                first[case, centre, slot] = a
+                second[case, centre, slot] = b
+    return first, second
+
+
+# Indexed by [2 * case + centre_above, slot]
+_EDGE_FIRST, _EDGE_SECOND = (table.reshape(32, 2) for table in _edge_table())
+
+# Corners at either end of each cell edge, in increasing x or y, and the
+# cell across it
+_CORNER_A = np.array([0, 1, 3, 0])
+_CORNER_B = np.array([1, 2, 2, 3])
+_NEIGHBOUR_ROW = np.array([-1, 0, 1, 0])
+_NEIGHBOUR_COL = np.array([0, 1, 0, -1])
+
+
+def lower_envelope(f):
+    """Return min over q of (x - q)^2 + f[r, q] for every row r and column x.
+
+    ``f`` is a 2-D float array; an inf entry adds no parabola, but every row
+    needs a finite one. All rows are done at once: the parabolas that can
+    be lowest anywhere are the vertices of the lower convex hull of the
+    points (q, f[q] + q^2), and every point that is not is removed in a few
+    vectorized rounds of neighbour tests on a linked list along the rows.
+    """
+    f = np.asarray(f, dtype=float)
+    height, width = f.shape
+    size = height * width
+    q = np.arange(width, dtype=float)
+    h = np.minimum(f + q * q, 1e30).ravel()
+    qs = np.tile(q, height)
+
+    # Neighbours along each row, -1 past either end
+    before = np.arange(-1, size - 1)
+    before[::width] = -1
+    after = np.arange(1, size + 1)
+    after[width - 1::width] = -1
+    alive = np.ones(size, dtype=bool)
+
+    # A point is off the hull if it is not below the line joining its
+    # neighbours; removing some brings new neighbours to test
+    grid = h.reshape(height, width)
+    gone = np.flatnonzero((2 * grid[:, 1:-1] >= grid[:, :-2] + grid[:, 2:]).ravel())
+    gone += 1 + 2 * (gone // max(width - 2, 1))
+    while len(gone):
+        alive[gone] = False
+        # Unlink each run of consecutive removed points at once
+        run_start = np.ones(len(gone), dtype=bool)
+        run_start[1:] = after[gone[:-1]] != gone[1:]
+        run_end = np.ones(len(gone), dtype=bool)
+        run_end[:-1] = run_start[1:]
+        left, right = before[gone[run_start]], after[gone[run_end]]
+        after[left] = right
+        before[right] = left
+
+        points = np.sort(np.concatenate([left, right]))
+        points = points[np.concatenate([[True], points[1:] != points[:-1]])]
+        a, b = before[points], after[points]
+        inner = (a >= 0) & (b >= 0)
+        points, a, b = points[inner], a[inner], b[inner]
+        gone = points[(h[points] - h[a]) * (qs[b] - qs[a]) >= (h[b] - h[a]) * (qs[points] - qs[a])]
+
+    # Hull vertex v is lowest from where it meets the one before it up to
+    # where it meets the one after it; it takes the columns in between
+    vertices = np.flatnonzero(alive)
+    hv, qv = h[vertices], qs[vertices]
+    # q drops where a new row starts, and a row's last vertex runs to its end
+    steps = np.diff(qv)
+    same_row = steps > 0
+    meet = np.clip(np.diff(hv) / (2 * np.where(same_row, steps, 1)), -1, width - 1)
+    bound = np.append(np.where(same_row, meet, width - 1), width - 1)
+    # Last node taken by each vertex; node n takes the vertex after those
+    # whose last node is before it
+    last = np.maximum.accumulate(np.floor(bound).astype(np.intp) + vertices // width * width)
+    nearest = np.cumsum(np.bincount(last[:-1] + 1, minlength=size + 1)[:size])
+    offset = hv - qv * qv
+    return (q - qv[nearest].reshape(height, width)) ** 2 + offset[nearest].reshape(height, width)
+
+
+def _line_distances(points, width, height):
+    """Return the squared distance from each node to the curve along its column line, and the inside mask.
+
+    ``points`` is a closed polyline in grid units. The distance is to the
+    nearest point where the curve crosses the node's column line (inf if it
+    never does); a node is inside when an odd number of them lie above it.
+    """
+    # Edge e crosses the column lines c with low <= c < high
+    ends = np.roll(points, -1, axis=0)
+    low = np.minimum(points[:, 0], ends[:, 0])
+    high = np.maximum(points[:, 0], ends[:, 0])
+    first = np.clip(np.ceil(low), 0, width).astype(np.intp)
+    counts = np.clip(np.ceil(high), 0, width).astype(np.intp) - first
+    edge = np.repeat(np.arange(len(counts)), counts)
+    columns = first[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)
+    x0, y0 = points[edge, 0], points[edge, 1]
+    y = y0 + (columns - x0) * (ends[edge, 1] - y0) / (ends[edge, 0] - x0)
+
+    # Rows at or below each crossing start at ceil(y), rows at or above it
+    # end at floor(y); carrying the crossings down and up the columns finds
+    # the nearest one each way
+    above = np.full((height, width), -np.inf)
+    np.maximum.at(above, (np.ceil(y).astype(np.intp), columns), y)
+    below = np.full((height, width), np.inf)
+    np.minimum.at(below, (np.floor(y).astype(np.intp), columns), y)
+    rows = np.arange(height)[:, None]
+    distances = np.minimum(rows - np.maximum.accumulate(above, axis=0),
+                           np.minimum.accumulate(below[::-1], axis=0)[::-1] - rows)
+
+    # Crossings strictly above each node, counted down the columns
+    crossed = np.zeros((height, width), dtype=np.intp)
+    np.add.at(crossed, (np.floor(y).astype(np.intp) + 1, columns), 1)
+    inside = np.cumsum(crossed, axis=0) % 2 == 1
+    return distances ** 2, inside
+
+
+def curve_distance(points, shape):
+    """Return (distance, inside) for each node of a grid of ``shape`` around a closed curve.
+
+    ``points`` is the curve as an (N, 2) array in grid units, x along
+    columns and y along rows, within the grid's border. The distance is
+    the exact distance to the nearest point where the curve crosses a row
+    or column line through the nodes: a vertical pass along the column
+    lines, then lower_envelope along the rows, and the same with rows and
+    columns swapped. Those points are at most a cell apart along the
+    curve, so away from the curve the result is within a small fraction
+    of a cell of the distance to the curve itself.
+    """
+    height, width = shape
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    columns, inside = _line_distances(points, width, height)
+    rows, _ = _line_distances(points[:, ::-1], height, width)
+    return np.sqrt(np.minimum(lower_envelope(columns), lower_envelope(rows).T)), inside
+
+
+def _link_loops(successor):
+    """Return the loop and the position in it of each segment, given its successor.
+
+    Every segment has a unique successor, so the loops are its cycles. Each
+    loop is labelled by its lowest segment and positions count from there.
+    Both come from pointer jumping: vectorized lookups that double the
+    steps covered each round, until the labels stop changing after about
+    log2(longest loop) rounds.
+    """
+    count = len(successor)
+    index = np.arange(count)
+
+    # Label: lowest segment reachable, i.e. the loop's first segment
+    label = index
+    jump = successor
+    rounds = 0
+    while True:
+        lowest = np.minimum(label, label[jump])
+        jump = jump[jump]
+        rounds += 1
+        if np.array_equal(lowest, label):
+            break
+        label = lowest
+
+    # Steps to the loop's last segment, cutting each loop before its first
+    last = successor == label
+    remaining = (~last).astype(np.intp)
+    jump = np.where(last, index, successor)
+    for _ in range(rounds):
+        remaining = remaining + remaining[jump]
+        jump = jump[jump]
+    return label, np.bincount(label, minlength=count)[label] - 1 - remaining
+
+
+def _levels_at_or_below(values, levels):
+    """Return np.searchsorted(levels, values, side='right') for evenly spaced ``levels``."""
+    spacing, count = levels[0], len(levels)
+    below = np.clip(np.floor(values / spacing), 0, count).astype(np.intp)
+    # Rounding can leave the quotient one off either way
+    below += (below < count) & (levels[np.minimum(below, count - 1)] <= values)
+    below -= (below > 0) & (levels[below - 1] > values)
+    return below
+
+
+def marching_squares(field, spacing, count):
+    """Return the closed iso-contours of ``field`` at spacing, 2 * spacing, ... count * spacing.
+
+    Returns one list per level of (N, 2) arrays of (x, y) = (column, row)
+    points, largest first, with crossings interpolated linearly along cell
+    edges; a cell where the field spans several levels contributes to
+    each. The field must lie below ``spacing`` on its border so every
+    contour closes.
+    """
+    field = np.asarray(field, dtype=float)
+    height, width = field.shape
+    levels = spacing * np.arange(1, count + 1)
+    contours = [[] for _ in levels]
+
+    # Cell (r, c) has corners r..r+1, c..c+1 and crosses level k where
+    # min < levels[k] <= max: the levels at or below its highest corner
+    # but not its lowest. Levels are evenly spaced, so counting them at
+    # each node is arithmetic. Flat cell ids run along rows of width - 1.
+    quad = [field[:-1, :-1], field[:-1, 1:], field[1:, 1:], field[1:, :-1]]
+    below = _levels_at_or_below(field, levels)
+    counts = [below[:-1, :-1], below[:-1, 1:], below[1:, 1:], below[1:, :-1]]
+    first_level = np.minimum(np.minimum(counts[0], counts[1]), np.minimum(counts[2], counts[3])).ravel()
+    crossed = np.maximum(np.maximum(counts[0], counts[1]), np.maximum(counts[2], counts[3])).ravel() - first_level
+    cells = np.flatnonzero(crossed)
+    if not len(cells):
+        return contours
+    first_level, crossed = first_level[cells], crossed[cells]
+
+    # One entry per crossed (cell, level), each cell's levels in order
+    entry_start = np.cumsum(crossed) - crossed
+    entry_cell = np.repeat(cells, crossed)
+    entries = len(entry_cell)
+    level_index = np.arange(entries) - np.repeat(entry_start - first_level, crossed)
+    level = levels[level_index]
+    values = np.stack([corner.ravel()[entry_cell] for corner in quad])
+    above = values >= level
+    case = above[0] | (above[1] << 1) | (above[2] << 2) | (above[3] << 3)
+
+    # Only saddles depend on the centre; their second segment is appended
+    # after the first segment of every entry
+    saddles = np.flatnonzero((case == 5) | (case == 10))
+    key = 2 * case
+    key[saddles] += values[:, saddles].mean(axis=0) >= level[saddles]
+    entry = np.concatenate([np.arange(entries), saddles])
+    first = np.concatenate([_EDGE_FIRST[key, 0], _EDGE_FIRST[key[saddles], 1]])
+    second = np.concatenate([_EDGE_SECOND[key, 0], _EDGE_SECOND[key[saddles], 1]])
+    second_segment = np.full(entries, -1)
+    second_segment[saddles] = entries + np.arange(len(saddles))
+
+    # A segment continues in the cell across its second edge, at the same
+    # level, with the segment that starts on that shared edge
+    level_zero_entry = np.zeros((height - 1) * (width - 1), dtype=np.intp)
+    level_zero_entry[cells] = entry_start - first_level
+    neighbour = entry_cell[entry] + _NEIGHBOUR_ROW[second] * (width - 1) + _NEIGHBOUR_COL[second]
+    next_entry = level_zero_entry[neighbour] + level_index[entry]
+    successor = np.where(first[next_entry] == (second + 2) % 4, next_entry, second_segment[next_entry])
+    loop, position = _link_loops(successor)
+
+    # Each segment contributes the crossing on its first edge
+    r, c = np.divmod(entry_cell[entry], width - 1)
+    fa = values[_CORNER_A[first], entry]
+    fb = values[_CORNER_B[first], entry]
+    t = (level[entry] - fa) / (fb - fa)
+    vertical = first & 1
+    points = np.stack([c + (first == 1) + t * (1 - vertical), r + (first == 2) + t * vertical], axis=1)
+
+    # Loops grouped by level, largest first, each from its first segment
+    sizes = np.bincount(loop, minlength=len(loop))
+    heads = np.flatnonzero(sizes)
+    heads = heads[np.lexsort((-sizes[heads], level_index[entry[heads]]))]
+    starts = np.zeros(len(loop), dtype=np.intp)
+    starts[heads] = np.cumsum(sizes[heads]) - sizes[heads]
+    order = np.empty(len(loop), dtype=np.intp)
+    order[starts[loop] + position] = np.arange(len(loop))
+    for k, contour in zip(level_index[entry[heads]], np.split(points[order], starts[heads][1:])):
+        contours[k].append(contour)
+    return contours
+
+
+def smooth_noise(shape, scale, amplitude, rng=None):
+    """Return smooth value noise of ``shape`` within +-``amplitude``.
+
+    Uniform values on a grid ``scale`` cells apart are interpolated with
+    smoothstep weights, separably, as two small matrix products. ``rng``
+    is a random.Random, a numpy Generator or None (the global random
+    module).
+    """
+    if not isinstance(rng, np.random.Generator):
+        rng = np.random.default_rng((random if rng is None else rng).getrandbits(128))
+    height, width = shape
+    grid = rng.uniform(-amplitude, amplitude, (int(height // scale) + 2, int(width // scale) + 2))
+
+    def weights(size, nodes):
+        # (size, nodes) matrix mixing the two grid nodes around each sample
+        position = np.arange(size) / scale
+        node = position.astype(np.intp)
+        t = position - node
+        t = t * t * (3 - 2 * t)
+        matrix = np.zeros((size, nodes))
+        matrix[np.arange(size), node] = 1 - t
+        matrix[np.arange(size), node + 1] = t
+        return matrix
+
+    return weights(height, grid.shape[0]) @ grid @ weights(width, grid.shape[1]).T
+
+
+def iter_contour_curves(num_curves, length, error, segment_length=3, canvas_size=1000,
+                        radius=450, rng=None, outer_curve=None, noise_scale=None):
+    """Yield the outer curve and then one iso-contour per level inside it.
+
+    The outer curve is ``outer_curve`` or the initial circle. Level k (1 to
+    ``num_curves - 1``) is the contour at distance k * ``length`` inside
+    it, displaced by smooth noise of up to ``error`` (at most half of
+    ``length``, or ValueError) that varies over ``noise_scale`` pixels (default
+    4 * segment_length). The field is sampled on a grid ``segment_length``
+    pixels apart. A level may split into several loops on a non-convex
+    shape; only the largest is yielded, so there is one curve per level,
+    as an (N, 2) array resampled to ``segment_length`` with its first
+    point repeated at the end. Stops at the first level with no contour,
+    so at most ``num_curves`` curves are yielded.
+    """
+    if error > MAX_ERROR_FRACTION * length:
+        raise ValueError(f"error {error} is more than {MAX_ERROR_FRACTION * length:g} "
+                         f"({MAX_ERROR_FRACTION:g} x distance {length}); contour curves could cross")
+    if outer_curve is None:
+        outer_curve = generate_initial_circle(canvas_size, radius, segment_length)
+    outer = np.asarray(outer_curve, dtype=float).reshape(-1, 2)
+    yield outer_curve
+    if num_curves < 2 or len(outer) < 3:
+        return
+
+    # Grid nodes segment_length apart, with a border of one cell around
+    # the curve
+    step = float(segment_length)
+    origin = outer.min(axis=0) - step
+    width, height = (np.ceil((outer.max(axis=0) - origin) / step) + 2).astype(int)
+    distance, inside = curve_distance((outer - origin) / step, (height, width))
+
+    noise = smooth_noise(inside.shape, (noise_scale or 4 * segment_length) / step, error, rng)
+    field = np.where(inside, distance * step + noise, 0.0)
+
+    loops = []
+    for contours in marching_squares(field, length, num_curves - 1):
+        if not contours:
+            break
+        loops.append(contours[0] * step + origin)
+    yield from resample_loops(loops, segment_length)
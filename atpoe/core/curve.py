@@ -0,0 +1,108 @@
+"""
+atpoe/core/curve.py - Compact array-backed curve type
+
+This module provides the Curve class, an immutable sequence of (x, y)
+vertices stored in one contiguous float64 (N, 2) NumPy buffer (16 bytes
+per vertex instead of ~120 for a list of tuples).
+
+A Curve still behaves like the lists of tuples used throughout the code:
+len(curve), curve[i], curve[-1], slicing and ``for x, y in curve`` all
+work and yield plain Python floats. np.asarray(curve) returns the buffer
+without copying, so downstream code can switch to vectorized operations.
+Geometric properties (centroid, bounding box, perimeter, length) are
+computed once and cached.
+"""
+
+from functools import cached_property
+from typing import Iterator, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class Curve:
+    """Immutable curve of (x, y) vertices backed by a float64 (N, 2) array."""
+
+    def __init__(self, points: Union[Sequence[Tuple[float, float]], np.ndarray, 'Curve']):
+        if isinstance(points, Curve):
+            self._points = points._points
+            return
+
+        # Always copy, so the caller cannot mutate the buffer behind the caches
+        array = np.array(points, dtype=np.float64)
+        if array.size == 0:
+            array = array.reshape(0, 2)
+        if array.ndim != 2 or array.shape[1] != 2:
+            raise ValueError(f"Curve points must have shape (N, 2), got {array.shape}")
+        array.flags.writeable = False
+        self._points = array
+
+    @property
+    def points(self) -> np.ndarray:
+        """Read-only (N, 2) float64 array of vertices."""
+        return self._points
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self._points.dtype:
+            return self._points.copy() if copy else self._points
+        return self._points.astype(dtype)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return map(tuple, self._points.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Curve(self._points[index])
+        x, y = self._points[index].tolist()
+        return (x, y)
+
+    def __eq__(self, other):
+        if not isinstance(other, Curve):
+            return NotImplemented
+        return np.array_equal(self._points, other._points)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Curve({len(self)} points)"
+
+    def to_list(self) -> list:
+        """Return the vertices as a list of (x, y) tuples."""
+        return list(self)
+
+    @cached_property
+    def centroid(self) -> Tuple[float, float]:
+        """Mean of the vertices, the curve center used by the generators."""
+        if not len(self):
+            raise ValueError("Empty curve has no centroid")
+        x, y = self._points.mean(axis=0).tolist()
+        return (x, y)
+
+    @cached_property
+    def bounding_box(self) -> Tuple[float, float, float, float]:
+        """Return (x_min, y_min, x_max, y_max)."""
+        if not len(self):
+            raise ValueError("Empty curve has no bounding box")
+        x_min, y_min = self._points.min(axis=0).tolist()
+        x_max, y_max = self._points.max(axis=0).tolist()
+        return (x_min, y_min, x_max, y_max)
+
+    @cached_property
+    def segment_lengths(self) -> np.ndarray:
+        """Lengths of the closed curve's segments; the last one wraps to the start."""
+        deltas = np.roll(self._points, -1, axis=0) - self._points
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+        lengths.flags.writeable = False
+        return lengths
+
+    @cached_property
+    def perimeter(self) -> float:
+        """Length of the closed curve, including the segment back to the start."""
+        return float(self.segment_lengths.sum())
+
+    @cached_property
+    def length(self) -> float:
+        """Length of the open polyline from the first to the last vertex."""
+        return float(self.segment_lengths[:-1].sum()) if len(self) > 1 else 0.0
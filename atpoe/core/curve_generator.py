@@ -4,63 +4,65 @@ atpoe/core/curve_generator.py - Working curve generation functions
 This module provides the core functions for generating nested curves:
 - generate_initial_circle: Creates the starting circle
 - generate_nested_curve: Creates inward-progressing curves with error
+- iter_nested_curves: Yields the initial circle and its nested curves one by one
 - do_lines_intersect: Collision detection using CCW algorithm
 """
 
+import functools
 import math
 import random
-from PIL import Image, ImageDraw
 
-def generate_initial_circle(canvas_size, radius, segment_length=3):
-    """Generate initial circle centered at canvas center with fixed segment length."""
+import numpy as np
+
+# Colors cycled over successive curves by the CLI and sweeps
+COLORS = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink', 'gray', 'cyan']
+
+@functools.lru_cache(maxsize=32)
+def _circle_points(canvas_size, radius, segment_length):
+    """Return the initial circle as a tuple of points (shared, never mutated)."""
     center_x = canvas_size // 2
     center_y = canvas_size // 2
+    angle_step = segment_length / radius
+    
+    # Point k lies k steps around the circle. The ring closes at the first
+    # point, from the 10th on, within segment_length of the start; the
+    # distance from the start is the chord 2 r |sin(k * step / 2)|.
+    max_points = int(2 * math.pi * radius / segment_length) + 100
+    steps = np.arange(1, max_points + 1)
+    chords = 2 * abs(radius) * np.abs(np.sin(steps * (angle_step / 2)))
+    closing = np.flatnonzero((chords <= segment_length) & (steps >= 10))
+    if len(closing):
+        count = int(steps[closing[0]])
+    else:
+        count = max_points
+        print(f"Warning: Circle generation reached maximum iterations ({max_points})")
+    
+    angles = np.arange(count + 1) * angle_step
+    xs = center_x + radius * np.cos(angles)
+    ys = center_y + radius * np.sin(angles)
+    return tuple(zip(xs.tolist(), ys.tolist()))
+
+
+def generate_initial_circle(canvas_size, radius, segment_length=3):
+    """Generate initial circle centered at canvas center with fixed segment length.
     
-    points = []
-    start_point = (center_x + radius, center_y)  # Start at (radius, 0)
-    current_point = start_point
-    points.append(current_point)
-    
-    # Safety limit to prevent infinite loops
-    max_iterations = int(2 * math.pi * radius / segment_length) + 100
-    iteration_count = 0
-    
-    while iteration_count < max_iterations:
-        iteration_count += 1
-        
-        # Calculate next point on circle at segment_length distance
-        # Move clockwise around the circle
-        dx = current_point[0] - center_x
-        dy = current_point[1] - center_y
-        
-        # Rotate by small angle to get next point
-        angle_step = segment_length / radius
-        cos_step = math.cos(angle_step)
-        sin_step = math.sin(angle_step)
-        
-        new_x = center_x + dx * cos_step - dy * sin_step
-        new_y = center_y + dx * sin_step + dy * cos_step
-        
-        new_point = (new_x, new_y)
-        points.append(new_point)
-        
-        # Check if we're close enough to start point
-        distance_to_start = math.hypot(new_x - start_point[0], new_y - start_point[1])
-        if distance_to_start <= segment_length and len(points) > 10:  # Need at least some points
-            break
-        
-        current_point = new_point
-    
-    if iteration_count >= max_iterations:
-        print(f"Warning: Circle generation reached maximum iterations ({max_iterations})")
-    
-    return points
+    Each point is computed directly from its angle instead of by rotating
+    the previous one, so there is no accumulated drift. Circles are cached
+    by (canvas_size, radius, segment_length); every call returns a new list.
+    """
+    return list(_circle_points(canvas_size, radius, segment_length))
 
-def generate_nested_curve(outer_curve, length, error, segment_length=3):
-    """Generate a nested curve inside the outer curve with fixed segment length."""
+def generate_nested_curve(outer_curve, length, error, segment_length=3, rng=None):
+    """Generate a nested curve inside the outer curve with fixed segment length.
+    
+    Error draws come from ``rng`` (a random.Random or numpy Generator), or
+    from the global random module when it is None.
+    """
     if len(outer_curve) < 3:
         return None
     
+    uniform = (random if rng is None else rng).uniform
+    
     # Calculate center of outer curve
     center_x = sum(x for x, y in outer_curve) / len(outer_curve)
     center_y = sum(y for x, y in outer_curve) / len(outer_curve)
@@ -76,8 +78,8 @@ def generate_nested_curve(outer_curve, length, error, segment_length=3):
     d = math.hypot(dx, dy) or 1.0
     
     # Add small random error
-    error_x = random.uniform(-error, error)
-    error_y = random.uniform(-error, error)
+    error_x = uniform(-error, error)
+    error_y = uniform(-error, error)
     
     # Place first point at length distance inside
     first_point = (
@@ -98,8 +100,8 @@ def generate_nested_curve(outer_curve, length, error, segment_length=3):
         d = math.hypot(dx, dy) or 1.0
         
         # Add small random error
-        error_x = random.uniform(-error, error)
-        error_y = random.uniform(-error, error)
+        error_x = uniform(-error, error)
+        error_y = uniform(-error, error)
         
         target_point = (
             outer_point[0] + (dx / d) * length + error_x,
@@ -142,6 +144,26 @@ def generate_nested_curve(outer_curve, length, error, segment_length=3):
     new_curve.append(new_curve[0])
     return new_curve
 
+def iter_nested_curves(num_curves, length, error, segment_length=3, canvas_size=1000,
+                       radius=450, nested_curve=generate_nested_curve, rng=None):
+    """Yield the initial circle and then each nested curve, one at a time.
+    
+    Each curve depends only on the previous one, so only that curve is kept
+    alive; memory stays bounded however many curves are requested. Stops
+    early if the generator fails to produce a curve. ``rng`` is passed to
+    every nested_curve call.
+    """
+    curve = None
+    for i in range(num_curves):
+        if i == 0:
+            curve = generate_initial_circle(canvas_size, radius, segment_length)
+        else:
+            curve = nested_curve(curve, length, error, segment_length, rng=rng)
+        
+        if curve is None:
+            return
+        yield curve
+
 def do_lines_intersect(p1, p2, p3, p4):
     """Check if line segments (p1,p2) and (p3,p4) intersect using CCW algorithm."""
     def ccw(A, B, C):
@@ -149,24 +171,26 @@ def do_lines_intersect(p1, p2, p3, p4):
     
     return ccw(p1, p3, p4) != ccw(p2, p3, p4) and ccw(p1, p2, p3) != ccw(p1, p2, p4)
 
-def draw_curves(curves, canvas_size, output_file):
-    """Draw all curves to an image file."""
-    img = Image.new('RGB', (canvas_size, canvas_size), 'white')
-    draw = ImageDraw.Draw(img)
+def draw_curves(curves, canvas_size, output_file, antialias=False, tile_size=None):
+    """Draw all curves to an image file, anti-aliased if requested.
+    
+    With ``tile_size``, the PNG is rendered and written tile by tile
+    instead of as one image, for canvases too large to hold in memory.
+    """
+    # Imported here: atpoe.graphics builds on atpoe.core
+    from atpoe.graphics.render import render_curves
+    from atpoe.graphics.tiled import render_tiled
     
     colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
     
-    for i, curve in enumerate(curves):
-        if len(curve) < 2:
-            continue
-        
-        color = colors[i % len(colors)]
-        
-        # Draw the curve
-        for j in range(len(curve)):
-            p1 = curve[j]
-            p2 = curve[(j + 1) % len(curve)]
-            draw.line([p1, p2], fill=color, width=2)
+    if tile_size:
+        render_tiled(curves, canvas_size, output_file, colors, width=2, antialias=antialias,
+                     tile_size=tile_size)
+        print(f"Curves saved to {output_file}")
+        return
+    
+    # One draw call per curve
+    img = render_curves(curves, canvas_size, colors, width=2, antialias=antialias)
     
     img.save(output_file)
     print(f"Curves saved to {output_file}")
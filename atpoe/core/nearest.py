@@ -0,0 +1,87 @@
+"""
+atpoe/core/nearest.py - Nearest-vertex lookup on a curve
+
+This module provides a prebuilt nearest-neighbour index over the vertices
+of a curve, used by the tracking generators that follow the previous curve:
+- NearestPointIndex: uniform-grid index answering nearest-vertex queries
+
+The grid is searched in square rings around the query cell and stops as
+soon as no unvisited ring can hold a closer vertex, so a query touches a
+handful of cells instead of the whole curve. Results are identical to a
+brute-force scan, including the tie-break on the first vertex in curve
+order.
+"""
+
+import math
+from collections import defaultdict
+
+
+class NearestPointIndex:
+    """Uniform-grid nearest-neighbour index over the vertices of a curve."""
+
+    def __init__(self, points, cell_size=3):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+
+        self.points = [(float(x), float(y)) for x, y in points]
+        self.cell_size = float(cell_size)
+        self.grid = defaultdict(list)
+
+        for i, (x, y) in enumerate(self.points):
+            self.grid[self._cell(x, y)].append(i)
+
+        if self.grid:
+            cells_x = [cx for cx, _ in self.grid]
+            cells_y = [cy for _, cy in self.grid]
+            self._bounds = (min(cells_x), max(cells_x), min(cells_y), max(cells_y))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, x, y):
+        """Return the grid cell containing (x, y)."""
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def _ring(self, cx, cy, r):
+        """Yield the cells at Chebyshev distance r from cell (cx, cy)."""
+        if r == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-r, r + 1):
+            yield (cx + dx, cy - r)
+            yield (cx + dx, cy + r)
+        for dy in range(-r + 1, r):
+            yield (cx - r, cy + dy)
+            yield (cx + r, cy + dy)
+
+    def nearest_index(self, point):
+        """Return the index of the vertex closest to point, or None if empty."""
+        if not self.points:
+            return None
+
+        px, py = point
+        cx, cy = self._cell(px, py)
+        min_x, max_x, min_y, max_y = self._bounds
+        max_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+
+        best_dist = float('inf')
+        best_index = None
+        for r in range(max_ring + 1):
+            for cell in self._ring(cx, cy, r):
+                for i in self.grid.get(cell, ()):
+                    ox, oy = self.points[i]
+                    dist = math.hypot(px - ox, py - oy)
+                    if dist < best_dist or (dist == best_dist and i < best_index):
+                        best_dist = dist
+                        best_index = i
+
+            # Every cell beyond ring r is at least r * cell_size away
+            if best_index is not None and best_dist < r * self.cell_size:
+                break
+
+        return best_index
+
+    def nearest(self, point):
+        """Return the vertex closest to point, or None if the index is empty."""
+        index = self.nearest_index(point)
+        return None if index is None else self.points[index]
@@ -0,0 +1,169 @@
+"""
+atpoe/core/resample.py - Arc-length resampling of curves
+
+This module respaces a curve's vertices evenly along its length:
+- arc_lengths: Cumulative length at each vertex
+- mean_spacing: Average distance between consecutive vertices
+- resample_count: Resample a curve to a given number of vertices
+- resample_curve: Resample a curve to a given vertex spacing
+- resample_loops: Resample many closed curves to a given spacing at once
+
+Generators that move every vertex of the previous curve inward keep its
+vertex count, so vertices crowd together as the curves shrink. Resampling
+each new curve to a fixed spacing keeps its vertex count proportional to
+its perimeter instead, and can follow any generator as a post-step.
+
+The cumulative arc length is computed once with np.cumsum, and every new
+vertex is placed by finding its edge with np.searchsorted and
+interpolating along it, in one vectorized pass. A closed curve whose last
+vertex repeats its first (as the generators emit them) is resampled as
+the same loop and keeps that closing vertex.
+"""
+
+import numpy as np
+
+
+def _as_points(curve):
+    return np.asarray(curve, dtype=float).reshape(-1, 2)
+
+
+def _loop(points, closed):
+    """Return (points without a repeated closing vertex, whether one was repeated)."""
+    repeats_start = closed and len(points) > 1 and np.array_equal(points[0], points[-1])
+    return (points[:-1] if repeats_start else points), repeats_start
+
+
+def _like(curve, points):
+    """Return points as an array for array input, else as a list of (x, y) tuples."""
+    if isinstance(curve, np.ndarray) or hasattr(curve, '__array__'):
+        return points
+    return list(map(tuple, points.tolist()))
+
+
+def arc_lengths(curve, closed=True):
+    """Return the cumulative length at each vertex, starting at 0.
+
+    For a closed curve the last entry is the full perimeter, back at the
+    first vertex, so the result has one more entry than the curve.
+    """
+    points = _as_points(curve)
+    if closed and len(points):
+        points = np.vstack([points, points[:1]])
+    steps = np.diff(points, axis=0)
+    return np.concatenate([[0.0], np.cumsum(np.hypot(steps[:, 0], steps[:, 1]))])
+
+
+def mean_spacing(curve, closed=True):
+    """Return the average distance between consecutive vertices."""
+    points, _ = _loop(_as_points(curve), closed)
+    segments = len(points) if closed else len(points) - 1
+    if segments <= 0:
+        return 0.0
+    return float(arc_lengths(points, closed)[-1] / segments)
+
+
+def resample_count(curve, count, closed=True):
+    """Return ``count`` vertices spaced evenly along the curve.
+
+    A closed curve gets ``count`` distinct vertices around its loop, plus
+    the repeated closing vertex if the input had one; an open curve keeps
+    its two end points. Points are returned as an (N, 2) array for array
+    (or Curve) input and as a list of (x, y) tuples otherwise.
+    """
+    points, repeats_start = _loop(_as_points(curve), closed)
+    if len(points) < 2 or count < 2:
+        return _like(curve, _as_points(curve).copy())
+
+    cumulative = arc_lengths(points, closed)
+    total = cumulative[-1]
+    if total == 0:
+        return _like(curve, _as_points(curve).copy())
+
+    # Edge i runs from vertex i to vertex i + 1 (wrapping for a closed curve)
+    starts = points
+    ends = np.roll(points, -1, axis=0) if closed else points[1:]
+    edges = ends[:len(cumulative) - 1] - starts[:len(cumulative) - 1]
+
+    if closed:
+        targets = np.arange(count) * (total / count)
+    else:
+        targets = np.linspace(0.0, total, count)
+
+    # Last edge starting at or before each target; zero-length edges are skipped
+    edge = np.clip(np.searchsorted(cumulative, targets, side='right') - 1, 0, len(edges) - 1)
+    lengths = cumulative[edge + 1] - cumulative[edge]
+    t = np.where(lengths > 0, (targets - cumulative[edge]) / np.where(lengths > 0, lengths, 1), 0.0)
+    resampled = starts[edge] + edges[edge] * t[:, None]
+
+    if not closed:
+        resampled[-1] = points[-1]
+    if repeats_start:
+        resampled = np.vstack([resampled, resampled[:1]])
+    return _like(curve, resampled)
+
+
+def resample_curve(curve, segment_length, closed=True):
+    """Return the curve resampled so vertices are ``segment_length`` apart along it.
+
+    The vertex count is the length divided by ``segment_length``, rounded,
+    and the vertices split the length evenly, so the spacing is as close to
+    ``segment_length`` as a whole number of steps allows and a closed curve
+    has no short closing step. See resample_count for the returned type.
+    """
+    if segment_length <= 0:
+        raise ValueError(f"segment_length must be positive, got {segment_length}")
+    points, _ = _loop(_as_points(curve), closed)
+    if len(points) < 2:
+        return _like(curve, _as_points(curve).copy())
+
+    total = arc_lengths(points, closed)[-1]
+    minimum = 3 if closed else 2
+    count = max(minimum, int(round(total / segment_length)) + (0 if closed else 1))
+    return resample_count(curve, count, closed)
+
+
+def resample_loops(loops, segment_length):
+    """Return closed loops resampled as resample_curve would, all in one pass.
+
+    ``loops`` are (N, 2) arrays of at least two vertices, without a
+    repeated closing vertex, and of nonzero length. Each is returned as an
+    array with its first vertex repeated at the end, the vertex count and
+    spacing chosen as by resample_curve. The loops are concatenated, so
+    many short loops cost a few array operations rather than a call each.
+    """
+    if segment_length <= 0:
+        raise ValueError(f"segment_length must be positive, got {segment_length}")
+    if not len(loops):
+        return []
+    sizes = np.array([len(loop) for loop in loops])
+    points = np.concatenate([_as_points(loop) for loop in loops])
+    starts = np.cumsum(sizes) - sizes
+    lasts = starts + sizes - 1
+
+    # Edge i runs from vertex i to the next, or back to its loop's first
+    following = np.arange(1, len(points) + 1)
+    following[lasts] = starts
+    edges = np.take(points, following, axis=0) - points
+    lengths = np.hypot(edges[:, 0], edges[:, 1])
+    # Length along all loops to the end of each edge
+    cumulative = np.cumsum(lengths)
+    base = cumulative[lasts] - np.add.reduceat(lengths, starts)
+    totals = cumulative[lasts] - base
+    counts = np.maximum(3, np.round(totals / segment_length).astype(np.intp))
+
+    loop = np.repeat(np.arange(len(loops)), counts)
+    step = np.arange(len(loop)) - np.repeat(np.cumsum(counts) - counts, counts)
+    targets = base[loop] + step * (totals / counts)[loop]
+    # First edge ending after each target; zero-length edges are skipped
+    edge = np.clip(np.searchsorted(cumulative, targets, side='right'), starts[loop], lasts[loop])
+    spans = lengths[edge]
+    t = np.where(spans > 0, (targets - cumulative[edge] + spans) / np.where(spans > 0, spans, 1), 0.0)
+    # np.take gathers rows much faster than fancy indexing
+    resampled = np.take(points, edge, axis=0) + np.take(edges, edge, axis=0) * t[:, None]
+
+    # Each loop's vertices, then its first one again
+    closed = np.empty((len(resampled) + len(loops), 2))
+    ends = np.cumsum(counts + 1) - 1
+    closed[np.arange(len(resampled)) + loop] = resampled
+    closed[ends] = resampled[ends - np.arange(len(loops)) - counts]
+    return np.split(closed, ends[:-1] + 1)
@@ -0,0 +1,174 @@
+"""
+atpoe/core/storage.py - Binary storage for runs of curves
+
+This module stores many curves in one compact binary file:
+- save_curves: Write curves and run parameters to a curve file
+- CurveFile: Memory-mapped reader with random access to curve k
+- load_curves: Read every curve of a curve file
+- read_text_coordinates: Parse an "x,y"-per-line coordinate text file
+- import_text_curves: Convert coordinate text files into one curve file
+
+File layout (all integers and floats little-endian):
+
+    magic        4 bytes   b'ATPC'
+    version      uint32    FORMAT_VERSION
+    header_size  uint32    length of the JSON header in bytes
+    header       JSON      {"dtype", "params", "curves": [[offset, count], ...]}
+    padding      to a multiple of DATA_ALIGNMENT bytes
+    data         each curve as a (count, 2) float32 or float64 array
+
+Curve offsets are relative to the start of the data block. Opening a file
+maps it with np.memmap, so curve k is a read-only view into the file: it
+is not read until used and never parsed.
+"""
+
+import argparse
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b'ATPC'
+FORMAT_VERSION = 1
+DATA_ALIGNMENT = 16
+
+# Supported coordinate types, stored little-endian
+DTYPES = {
+    'float32': '<f4',
+    'float64': '<f8',
+}
+
+_PREAMBLE = struct.Struct('<4sII')
+
+
+def save_curves(path, curves, params=None, dtype='float64'):
+    """Write curves to ``path`` with an index header and run parameters.
+
+    ``params`` is any JSON-serializable dict (e.g. dist, segment_length,
+    error, seed) stored in the header. ``dtype`` is 'float32' or 'float64'.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}' (choose from {', '.join(DTYPES)})")
+    dtype = np.dtype(DTYPES[dtype])
+
+    arrays = [np.ascontiguousarray(np.asarray(curve, dtype=float).reshape(-1, 2), dtype=dtype)
+              for curve in curves]
+
+    index = []
+    offset = 0
+    for array in arrays:
+        index.append([offset, len(array)])
+        offset += array.nbytes
+
+    header = json.dumps({
+        'dtype': dtype.str,
+        'params': params or {},
+        'curves': index,
+    }).encode('utf-8')
+    data_start = _PREAMBLE.size + len(header)
+    padding = -data_start % DATA_ALIGNMENT
+
+    with open(path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b' ' * padding)
+        for array in arrays:
+            f.write(array.tobytes())
+
+
+class CurveFile:
+    """Memory-mapped curve file with random access to each curve.
+
+    Curves are returned as read-only (N, 2) array views into the mapped
+    file; copy them (or wrap them in Curve) to keep them after the
+    CurveFile is gone.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic, version, header_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not an AtPoE curve file")
+            if version > FORMAT_VERSION:
+                raise ValueError(f"{self.path} has format version {version}, "
+                                 f"newer than supported ({FORMAT_VERSION})")
+            header = json.loads(f.read(header_size).decode('utf-8'))
+
+        data_start = _PREAMBLE.size + header_size
+        data_start += -data_start % DATA_ALIGNMENT
+
+        self.dtype = np.dtype(header['dtype'])
+        self.params = header['params']
+        self._index = header['curves']
+        total = sum(count for _, count in self._index) * 2 * self.dtype.itemsize
+        self._data = (np.memmap(self.path, dtype=np.uint8, mode='r', offset=data_start, shape=(total,))
+                      if total else np.empty(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, k):
+        offset, count = self._index[k]
+        nbytes = count * 2 * self.dtype.itemsize
+        return self._data[offset:offset + nbytes].view(self.dtype).reshape(count, 2)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def __repr__(self):
+        return f"CurveFile({self.path.name!r}, {len(self)} curves)"
+
+    def point_counts(self):
+        """Return the number of points of each curve, without reading them."""
+        return [count for _, count in self._index]
+
+
+def load_curves(path):
+    """Return every curve in the file as an in-memory (N, 2) float64 array."""
+    return [np.array(curve, dtype=float) for curve in CurveFile(path)]
+
+
+def read_text_coordinates(path):
+    """Parse a coordinate text file with one "x,y" point per line."""
+    return np.loadtxt(path, delimiter=',', ndmin=2, dtype=float).reshape(-1, 2)
+
+
+def import_text_curves(paths, output, params=None, dtype='float64'):
+    """Convert coordinate text files, in the given order, into one curve file.
+
+    Returns the number of curves written.
+    """
+    curves = [read_text_coordinates(path) for path in paths]
+    save_curves(output, curves, params, dtype)
+    return len(curves)
+
+
+def main(argv=None):
+    """Command line entry point: convert coordinate text files to a curve file."""
+    parser = argparse.ArgumentParser(
+        description="Convert 'x,y' coordinate text files into one AtPoE curve file"
+    )
+    parser.add_argument('output', help='Curve file to write (e.g. run.atpc)')
+    parser.add_argument('inputs', nargs='+', help='Coordinate text files, one curve each, in order')
+    parser.add_argument('--dtype', choices=sorted(DTYPES), default='float64',
+                        help='Stored coordinate type (default: float64)')
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help='Run parameter to store in the header (repeatable)')
+    args = parser.parse_args(argv)
+
+    params = {}
+    for item in args.param:
+        key, value = item.split('=', 1)
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+    count = import_text_curves(args.inputs, args.output, params, args.dtype)
+    print(f"Wrote {count} curves to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
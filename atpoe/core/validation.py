@@ -0,0 +1,133 @@
+"""
+atpoe/core/validation.py - Validation of generated curves
+
+This module provides checks used to reject bad curves:
+- find_self_intersections: All pairs of segments of a closed curve that cross
+- is_simple_curve: True if a closed curve does not cross itself
+- closed_segments, do_lines_intersect_array, iter_pair_blocks: Vectorized
+  building blocks shared with the collision detector
+
+Self-intersections are found with a sweep line over x. Segments are sorted
+by their left end; when the sweep reaches a segment it is paired with every
+segment whose x-range overlaps its own, those pairs are pruned by y-range
+and the survivors get the same CCW test as do_lines_intersect. This is a
+bounding-box sweep, not an ordered active set: it costs O(n log n + p) for
+p x-overlapping pairs. On the generated curves, short segments spread
+around a loop, p stays close to n; long segments or long runs at nearly
+the same x make p, and the check, approach O(n^2).
+"""
+
+import numpy as np
+
+# Upper bound on candidate segment pairs tested per vectorized block
+SWEEP_BLOCK_PAIRS = 1 << 18
+
+
+def closed_segments(curve):
+    """Return the closed curve's segments as an (N, 4) array of x1, y1, x2, y2."""
+    points = np.asarray(curve, dtype=float).reshape(-1, 2)
+    return np.hstack([points, np.roll(points, -1, axis=0)])
+
+
+def do_lines_intersect_array(first, second):
+    """Vectorized do_lines_intersect over rows of x1, y1, x2, y2."""
+    def ccw(ax, ay, bx, by, cx, cy):
+        return (cy - ay) * (bx - ax) > (by - ay) * (cx - ax)
+
+    x1, y1, x2, y2 = first.T
+    x3, y3, x4, y4 = second.T
+    return ((ccw(x1, y1, x3, y3, x4, y4) != ccw(x2, y2, x3, y3, x4, y4))
+            & (ccw(x1, y1, x2, y2, x3, y3) != ccw(x1, y1, x2, y2, x4, y4)))
+
+
+def iter_pair_blocks(counts, block_pairs=SWEEP_BLOCK_PAIRS):
+    """Yield candidate pairs in blocks of about ``block_pairs``.
+
+    Entry i of ``counts`` is the number of partners of item i. Each block
+    covers consecutive items and is yielded as (owner, rank) arrays: for
+    every pair, the item it belongs to and the partner's rank among that
+    item's partners. Blocks may be empty and follow item order, so callers
+    can stop at the first hit.
+    """
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        done = int(cumulative[start - 1]) if start else 0
+        stop = int(np.searchsorted(cumulative, done + block_pairs, side='right'))
+        stop = max(stop, start + 1)
+        block_counts = counts[start:stop]
+        total = int(block_counts.sum())
+        offsets = np.cumsum(block_counts) - block_counts
+        owner = np.repeat(np.arange(start, stop), block_counts)
+        rank = np.arange(total) - np.repeat(offsets, block_counts)
+        yield owner, rank
+        start = stop
+
+
+def _sweep_self_intersections(curve):
+    """Yield (i, j) index arrays of crossing segment pairs, block by block."""
+    if len(curve) < 4:
+        return
+
+    segments = closed_segments(curve)
+
+    # Zero-length segments (e.g. a repeated closing point) cannot cross
+    # anything, and skipping them keeps "neighbours along the curve" simple:
+    # consecutive remaining segments share a vertex and are never compared.
+    indices = np.flatnonzero((segments[:, 0] != segments[:, 2]) | (segments[:, 1] != segments[:, 3]))
+    if len(indices) < 4:
+        return
+    segments = segments[indices]
+    n = len(segments)
+
+    x_min = np.minimum(segments[:, 0], segments[:, 2])
+    x_max = np.maximum(segments[:, 0], segments[:, 2])
+    y_min = np.minimum(segments[:, 1], segments[:, 3])
+    y_max = np.maximum(segments[:, 1], segments[:, 3])
+
+    # Sweep order: by left end. A segment is still active when a later one
+    # starts if its right end has not been passed yet.
+    order = np.argsort(x_min, kind='stable')
+    sorted_x_min = x_min[order]
+    first_partner = np.arange(1, n + 1)
+    end_partner = np.searchsorted(sorted_x_min, x_max[order], side='right')
+    counts = np.maximum(end_partner - first_partner, 0)
+
+    for a, rank in iter_pair_blocks(counts):
+        b = order[first_partner[a] + rank]
+        a = order[a]
+
+        # Prune by y-range (x-ranges overlap by construction) and drop
+        # neighbours along the curve
+        gap = np.abs(a - b)
+        keep = ((y_min[a] <= y_max[b]) & (y_min[b] <= y_max[a])
+                & (gap != 1) & (gap != n - 1))
+        a = a[keep]
+        b = b[keep]
+
+        crossing = do_lines_intersect_array(segments[a], segments[b])
+        a = indices[a[crossing]]
+        b = indices[b[crossing]]
+        if len(a):
+            yield np.minimum(a, b), np.maximum(a, b)
+
+
+def find_self_intersections(curve):
+    """Return all pairs (i, j), i < j, of segments of a closed curve that cross.
+
+    Segment i runs from curve[i] to curve[(i + 1) % len(curve)]. Two
+    segments cross when do_lines_intersect says so. Neighbouring segments
+    share a vertex by construction and are not compared; zero-length
+    segments are skipped.
+    """
+    pairs = []
+    for first, second in _sweep_self_intersections(curve):
+        pairs.extend(zip(first.tolist(), second.tolist()))
+    return sorted(pairs)
+
+
+def is_simple_curve(curve):
+    """Return True if a closed curve does not cross itself."""
+    for _ in _sweep_self_intersections(curve):
+        return False
+    return True
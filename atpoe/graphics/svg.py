@@ -0,0 +1,226 @@
+"""
+atpoe/graphics/svg.py - Streaming SVG export
+
+This module writes curves to SVG without building the document in memory:
+- simplify_curve: Ramer-Douglas-Peucker simplification to a tolerance
+- path_data: Compact relative path data with fixed precision
+- SVGWriter: Writes an SVG document element by element to a file handle
+- save_svg: Write a list of curves to an SVG file
+- svg_string: Return the SVG for a list of curves as a string
+
+Path data is built with one join per curve instead of repeated string
+concatenation. Coordinates are rounded to ``precision`` decimals first and
+then written as differences of the rounded values ("m x y l dx dy ..."),
+so the relative path reproduces the rounded absolute points exactly, with
+no drift, and small steps need few digits. Simplification drops only points
+that lie within ``tolerance`` pixels of the simplified outline, instead of
+keeping every n-th point.
+"""
+
+import io
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+# Maximum deviation in pixels allowed by save_svg / svg_string simplification
+DEFAULT_TOLERANCE = 0.25
+
+# Decimals written for coordinates
+DEFAULT_PRECISION = 2
+
+
+def _rdp_mask(points, tolerance):
+    """Return a boolean mask of the points kept by Ramer-Douglas-Peucker.
+
+    All open intervals between kept points are split in the same pass, so
+    each pass is one vectorized sweep over the points and the number of
+    passes is the depth of the recursion.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    active = np.ones(n, dtype=bool)
+
+    while True:
+        kept = np.flatnonzero(keep)
+        # Interval of each point: from the kept point at or before it to the next
+        interval = np.searchsorted(kept, np.arange(n), side='right') - 1
+        interval[-1] = len(kept) - 2
+        first = kept[interval]
+        last = kept[interval + 1]
+
+        candidates = np.flatnonzero(active & ~keep)
+        if not len(candidates):
+            break
+
+        start = points[first[candidates]]
+        chord = points[last[candidates]] - start
+        offset = points[candidates] - start
+        chord_length = np.hypot(chord[:, 0], chord[:, 1])
+        cross = np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0])
+        distances = np.where(chord_length > 0, cross / np.where(chord_length > 0, chord_length, 1),
+                             np.hypot(offset[:, 0], offset[:, 1]))
+
+        # Farthest point of each interval (first one on ties)
+        owner = interval[candidates]
+        order = np.lexsort((candidates, -distances, owner))
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = owner[order[1:]] != owner[order[:-1]]
+        farthest = order[is_first]
+
+        split = farthest[distances[farthest] > tolerance]
+        if not len(split):
+            break
+        keep[candidates[split]] = True
+
+        # Intervals whose farthest point is within tolerance are finished
+        done = np.zeros(len(kept) - 1, dtype=bool)
+        done[owner[farthest[distances[farthest] <= tolerance]]] = True
+        active[candidates[done[owner]]] = False
+
+    return keep
+
+
+def simplify_curve(curve, tolerance, closed=True):
+    """Return the curve's vertices simplified to within ``tolerance`` pixels.
+
+    A closed curve is split at its first point and the vertex farthest from
+    it, and each half is simplified separately, so the outline stays closed
+    and keeps its extent. Returns an (M, 2) float array.
+    """
+    points = np.asarray(curve, dtype=float).reshape(-1, 2)
+    if tolerance <= 0 or len(points) < 3:
+        return points
+
+    if not closed:
+        return points[_rdp_mask(points, tolerance)]
+
+    deltas = points - points[0]
+    far = int(np.argmax(np.hypot(deltas[:, 0], deltas[:, 1])))
+    if far == 0:
+        return points[:1]
+
+    # Walk 0 -> far -> back to 0 and simplify both halves
+    loop = np.vstack([points, points[:1]])
+    keep = np.zeros(len(loop), dtype=bool)
+    keep[:far + 1] = _rdp_mask(loop[:far + 1], tolerance)
+    keep[far:] |= _rdp_mask(loop[far:], tolerance)
+    return loop[:-1][keep[:-1]]
+
+
+def _format_numbers(values, precision):
+    """Format integer multiples of 10**-precision without trailing zeros."""
+    if precision == 0:
+        return list(map(str, values.tolist()))
+
+    scale = 10 ** precision
+    text = []
+    for value in values.tolist():
+        whole, fraction = divmod(abs(value), scale)
+        sign = '-' if value < 0 else ''
+        if fraction:
+            digits = str(fraction).rjust(precision, '0').rstrip('0')
+            text.append(f"{sign}{whole}.{digits}")
+        else:
+            text.append(f"{sign}{whole}")
+    return text
+
+
+def path_data(curve, precision=DEFAULT_PRECISION, closed=True):
+    """Return SVG path data for the curve using relative coordinates."""
+    points = np.asarray(curve, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return ""
+
+    scaled = np.round(points * 10 ** precision).astype(np.int64)
+    steps = np.diff(scaled, axis=0)
+    numbers = _format_numbers(np.concatenate([scaled[0], steps.ravel()]), precision)
+
+    parts = [f"m{numbers[0]} {numbers[1]}"]
+    if len(steps):
+        parts.append("l" + " ".join(numbers[2:]))
+    if closed:
+        parts.append("z")
+    return "".join(parts)
+
+
+class SVGWriter:
+    """Write an SVG document to a file, one element at a time.
+
+    ``output`` is a path or an open text file handle; a path is opened here
+    and closed by close(). Use as a context manager to finish the document.
+    """
+
+    def __init__(self, output, width, height=None, background='white',
+                 precision=DEFAULT_PRECISION, tolerance=0.0):
+        if isinstance(output, (str, Path)):
+            self.file = open(output, 'w', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self.file = output
+            self._owns_file = False
+
+        height = width if height is None else height
+        self.precision = precision
+        self.tolerance = tolerance
+        self.file.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        self.file.write(f'<svg width="{width}" height="{height}" '
+                        f'xmlns="http://www.w3.org/2000/svg" version="1.1">\n')
+        if background:
+            self.file.write(f'<rect width="{width}" height="{height}" fill={quoteattr(background)}/>\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    @staticmethod
+    def _attributes(attributes):
+        """Format keyword attributes; underscores become hyphens."""
+        return "".join(f' {name.replace("_", "-")}={quoteattr(str(value))}'
+                       for name, value in attributes.items() if value is not None)
+
+    def write_curve(self, curve, stroke='black', stroke_width=2, closed=True, **attributes):
+        """Write one curve as a <path> element."""
+        if len(curve) < 2:
+            return
+        points = simplify_curve(curve, self.tolerance, closed)
+        self.file.write(f'<path d="{path_data(points, self.precision, closed)}"'
+                        f'{self._attributes(dict(stroke=stroke, stroke_width=stroke_width, fill="none", **attributes))}/>\n')
+
+    def write_curves(self, curves, colors, stroke_width=2, closed=True, **attributes):
+        """Write curves, cycling through colors."""
+        for i, curve in enumerate(curves):
+            self.write_curve(curve, colors[i % len(colors)], stroke_width, closed, **attributes)
+
+    def write_text(self, x, y, text, font_size=16, fill='black', font_family='Arial'):
+        """Write a <text> element."""
+        self.file.write(f'<text{self._attributes(dict(x=x, y=y, font_family=font_family, font_size=font_size, fill=fill))}>'
+                        f'{escape(text)}</text>\n')
+
+    def close(self):
+        """Finish the document, closing the file if it was opened here."""
+        if self.file is None:
+            return
+        self.file.write('</svg>\n')
+        if self._owns_file:
+            self.file.close()
+        self.file = None
+
+
+def save_svg(curves, canvas_size, output_file, colors=('black',), stroke_width=2,
+             tolerance=DEFAULT_TOLERANCE, precision=DEFAULT_PRECISION):
+    """Write closed curves to an SVG file, simplified to ``tolerance`` pixels."""
+    with SVGWriter(output_file, canvas_size, precision=precision, tolerance=tolerance) as svg:
+        svg.write_curves(curves, colors, stroke_width)
+
+
+def svg_string(curves, canvas_size, colors=('black',), stroke_width=2,
+               tolerance=DEFAULT_TOLERANCE, precision=DEFAULT_PRECISION, **attributes):
+    """Return the SVG document for closed curves as a string."""
+    buffer = io.StringIO()
+    with SVGWriter(buffer, canvas_size, precision=precision, tolerance=tolerance) as svg:
+        svg.write_curves(curves, colors, stroke_width, **attributes)
+    return buffer.getvalue()
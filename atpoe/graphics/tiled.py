@@ -0,0 +1,229 @@
+"""
+atpoe/graphics/tiled.py - Tiled rendering of poster-size canvases
+
+This module draws curves onto a canvas too large to hold in memory:
+- PNGStreamWriter: Writes a PNG file a band of rows at a time
+- CurveTiles: Curve segments and band edges, culled per tile
+- render_tiled: Render curves tile by tile into a PNG file
+
+The canvas is split into square tiles of TILE_SIZE pixels. Each tile is
+rasterized on its own small CurveCanvas, with the curves shifted so the
+tile's corner is the origin, and the same Pillow calls draw the same
+pixels as on the full canvas. A row of tiles is then handed to the PNG
+writer and dropped, so memory holds one row of tiles (PNG rows span the
+full width) rather than the whole image: a 20,000 px poster needs about
+30 MB for its pixels instead of 1.2 GB.
+
+Each curve's and each segment's bounding box is computed once. A row of
+tiles only looks at the segments of curves whose boxes reach its rows,
+and a tile only draws those segments whose boxes (grown by the line
+width) reach the tile; consecutive kept segments of a curve are drawn as
+one polyline, so joints look as they do on the full canvas. Filled bands
+are computed per tile from the edges that can cross it (see
+atpoe.graphics.render.edge_depths).
+"""
+
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+from PIL import ImageColor
+
+from atpoe.graphics.render import (
+    JOINT, PNG_COMPRESS_LEVEL, SUPERSAMPLE, CurveCanvas, curve_edges, edge_depths
+)
+
+# Width and height of a tile in output pixels
+TILE_SIZE = 512
+
+# Rows compressed at a time by PNGStreamWriter
+WRITE_ROWS = 32
+
+# Extra pixels drawn around each tile and cropped off
+TILE_BORDER = 8
+
+
+class PNGStreamWriter:
+    """Writes an 8-bit RGB PNG file band by band, top to bottom.
+
+    Each band of rows is compressed as it arrives and written as an IDAT
+    chunk, so only the band being written is held in memory.
+    """
+
+    def __init__(self, output_file, size, compress_level=PNG_COMPRESS_LEVEL):
+        self.width, self.height = size
+        self.rows = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(output_file, 'wb')
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack('>I', len(data)) + kind)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, rows):
+        """Append a (rows, width, 3) uint8 array of pixel rows."""
+        rows = np.asarray(rows, dtype=np.uint8)
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"expected rows of shape (n, {self.width}, 3), got {rows.shape}")
+        if self.rows + len(rows) > self.height:
+            raise ValueError("more rows than the image height")
+        # Every row starts with its filter type, 0 (none); rows are copied
+        # into scanlines a few at a time to keep the copies small
+        for start in range(0, len(rows), WRITE_ROWS):
+            band = rows[start:start + WRITE_ROWS]
+            scanlines = np.zeros((len(band), self.width * 3 + 1), dtype=np.uint8)
+            scanlines[:, 1:] = band.reshape(len(band), -1)
+            data = self._compressor.compress(scanlines.tobytes())
+            if data:
+                self._chunk(b'IDAT', data)
+        self.rows += len(rows)
+
+    def close(self):
+        """Finish the file; every row must have been written."""
+        if self.rows != self.height:
+            self._file.close()
+            raise ValueError(f"wrote {self.rows} of {self.height} rows")
+        self._chunk(b'IDAT', self._compressor.flush())
+        self._chunk(b'IEND', b'')
+        self._file.close()
+
+
+class CurveTiles:
+    """Curve segments and band edges with bounding boxes, for culling per tile."""
+
+    def __init__(self, curves, fill=False):
+        points = [np.asarray(curve, dtype=float).reshape(-1, 2) for curve in curves]
+        self.points = [curve for curve in points if len(curve) >= 2]
+        self.curve_index = [i for i, curve in enumerate(points) if len(curve) >= 2]
+        self.boxes = np.array([[*curve.min(axis=0), *curve.max(axis=0)] for curve in self.points]).reshape(-1, 4)
+        self.offsets = np.concatenate([[0], np.cumsum([len(curve) for curve in self.points])]).astype(np.intp)
+
+        # Segment i of curve c runs from its vertex i to vertex i + 1 (wrapping)
+        if self.points:
+            starts = np.concatenate(self.points)
+            ends = np.concatenate([np.roll(curve, -1, axis=0) for curve in self.points])
+        else:
+            starts = ends = np.empty((0, 2))
+        self.low = np.minimum(starts, ends)
+        self.high = np.maximum(starts, ends)
+
+        self.edges = curve_edges(curves) if fill else None
+
+    def strip_segments(self, top, bottom, margin):
+        """Return the indices of segments that can reach rows top to bottom."""
+        near = np.flatnonzero((self.boxes[:, 1] - margin < bottom) & (self.boxes[:, 3] + margin > top))
+        if not len(near):
+            return np.empty(0, dtype=np.intp)
+        segments = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in near])
+        return segments[(self.low[segments, 1] - margin < bottom) & (self.high[segments, 1] + margin > top)]
+
+    def polylines(self, segments, left, top, right, bottom, margin):
+        """Yield (curve index, points) for runs of segments reaching the window.
+
+        ``segments`` are candidate indices in increasing order, e.g. from
+        strip_segments. A curve whose segments all reach the window is
+        yielded as its closed polyline.
+        """
+        segments = segments[(self.low[segments, 0] - margin < right) & (self.high[segments, 0] + margin > left) &
+                            (self.low[segments, 1] - margin < bottom) & (self.high[segments, 1] + margin > top)]
+        if not len(segments):
+            return
+        curves = np.searchsorted(self.offsets, segments, side='right') - 1
+        breaks = np.flatnonzero((np.diff(segments) != 1) | (np.diff(curves) != 0)) + 1
+        for run in np.split(np.arange(len(segments)), breaks):
+            c = curves[run[0]]
+            curve = self.points[c]
+            first = segments[run[0]] - self.offsets[c]
+            vertices = np.arange(first, first + len(run) + 1) % len(curve)
+            yield self.curve_index[c], curve[vertices]
+
+    def strip_edges(self, top, bottom):
+        """Return the band edges crossing rows top to bottom, as for edge_depths."""
+        starts, ends, signs = self.edges
+        low = np.minimum(starts[:, 1], ends[:, 1])
+        high = np.maximum(starts[:, 1], ends[:, 1])
+        # Vertices are cut to whole (supersampled) pixels, so an edge ending
+        # up to half a pixel above row top can still cross it
+        keep = (high >= top - 0.5) & (low < bottom)
+        return starts[keep], ends[keep], signs[keep]
+
+
+def _shift(points, left, top, scale):
+    """Map canvas points into a tile whose corner is (left, top), as closed_polyline does."""
+    points = points - (left, top)
+    if scale != 1:
+        points = points * scale + (scale - 1) / 2
+    return points
+
+
+def render_tiled(curves, size, output_file, colors, width=2, background='white', antialias=False,
+                 fill_colors=None, tile_size=TILE_SIZE, joint=JOINT, compress_level=PNG_COMPRESS_LEVEL):
+    """Render closed curves tile by tile into a PNG file.
+
+    Draws what render_curves would (with ``fill_colors``, filled bands
+    under the curves), but holds only one row of tiles in memory, so the
+    canvas may be far larger than an image that fits in memory.
+    """
+    if isinstance(size, int):
+        size = (size, size)
+    if Path(output_file).suffix.lower() != '.png':
+        raise ValueError(f"tiled rendering writes PNG files, not '{Path(output_file).suffix}'")
+    if tile_size < 1:
+        raise ValueError(f"tile_size must be positive, got {tile_size}")
+
+    canvas_width, canvas_height = size
+    scale = SUPERSAMPLE if antialias else 1
+    tiles = CurveTiles(curves, fill=bool(fill_colors))
+    inks = [ImageColor.getcolor(color, 'RGB') if isinstance(color, str) else color for color in colors]
+    blank = ImageColor.getcolor(background, 'RGB') if isinstance(background, str) else background
+    # Segments this close to a tile can still put ink on it
+    margin = width / 2 + 2 + TILE_BORDER
+
+    with PNGStreamWriter(output_file, size, compress_level) as writer:
+        for top in range(0, canvas_height, tile_size):
+            bottom = min(top + tile_size, canvas_height)
+            strip = np.empty((bottom - top, canvas_width, 3), dtype=np.uint8)
+            strip[:] = blank
+            segments = tiles.strip_segments(top, bottom, margin)
+            edges = tiles.strip_edges(top - TILE_BORDER, bottom + TILE_BORDER) if fill_colors else None
+
+            for left in range(0, canvas_width, tile_size):
+                right = min(left + tile_size, canvas_width)
+                polylines = list(tiles.polylines(segments, left, top, right, bottom, margin))
+                tile_edges = None
+                if edges is not None:
+                    near = np.minimum(edges[0][:, 0], edges[1][:, 0]) < right + TILE_BORDER
+                    tile_edges = tuple(part[near] for part in edges)
+                if not polylines and (tile_edges is None or not len(tile_edges[0])):
+                    continue
+
+                # Drawn with a border that is cropped off, since Pillow draws
+                # shapes cut by the image edge slightly differently
+                x0, y0 = left - TILE_BORDER, top - TILE_BORDER
+                tile_width, tile_height = right - left + 2 * TILE_BORDER, bottom - top + 2 * TILE_BORDER
+                canvas = CurveCanvas((tile_width, tile_height), background, antialias)
+                if tile_edges is not None and len(tile_edges[0]):
+                    starts, ends, signs = tile_edges
+                    depths = edge_depths(_shift(starts, x0, y0, scale), _shift(ends, x0, y0, scale),
+                                         signs, (tile_width * scale, tile_height * scale))
+                    canvas.paint_bands(depths, fill_colors)
+                for index, points in polylines:
+                    canvas.draw.line(_shift(points, x0, y0, scale).ravel().tolist(),
+                                     fill=inks[index % len(inks)], width=width * scale, joint=joint)
+                tile = np.asarray(canvas.image().convert('RGB'))
+                strip[:, left:right] = tile[TILE_BORDER:-TILE_BORDER, TILE_BORDER:-TILE_BORDER]
+
+            writer.write_rows(strip)
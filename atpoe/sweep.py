@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+atpoe/sweep.py - Parallel parameter sweeps
+
+This module runs a grid of (dist, segment_length, error, num_curves, seed)
+parameter sets over a process pool:
+- build_grid: Cartesian product of parameter values as a list of dicts
+- run_sweep: Run every parameter set and write a results manifest
+- run_single: Run one parameter set in this process, without a manifest
+- render_curves: Default renderer, one PNG per run
+- main: ``atpoe sweep`` command line entry point
+
+Runs are independent, so they are fanned out over a ProcessPoolExecutor.
+The outer curve is sent to each worker once, through the pool initializer,
+instead of being reloaded or pickled with every task. Every run draws its
+errors from its own random.Random(seed), so results do not depend on the
+number of workers or the order in which runs finish.
+
+With a cache directory, seeded runs reuse curves and rendered images from
+earlier sweeps (see atpoe.core.cache): a repeated sweep point skips
+generation, and with the same style skips rendering as well; a sweep point
+with more curves only generates the extra ones.
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from atpoe.core.cache import DEFAULT_CACHE_DIR, CurveCache, resume_curves, run_params
+from atpoe.core.curve import Curve
+from atpoe.core.curve_generator import COLORS, generate_initial_circle, generate_nested_curve
+from atpoe.graphics.render import draw_closed_curves
+from PIL import Image, ImageDraw
+
+MANIFEST_NAME = 'manifest.json'
+
+# Per-worker state, set once by _init_worker
+_OUTER_CURVE = None
+_NESTED_CURVE = None
+_RENDER = None
+_CACHE = None
+
+
+def build_grid(
+    dists: Sequence[int],
+    segment_lengths: Sequence[int],
+    errors: Sequence[float],
+    num_curves: Sequence[int],
+    seeds: Sequence[Optional[int]] = (0,)
+) -> List[Dict]:
+    """Return every combination of the parameter values, in a stable order."""
+    return [
+        {'dist': dist, 'segment_length': segment_length, 'error': error,
+         'num_curves': curves, 'seed': seed}
+        for dist, segment_length, error, curves, seed
+        in itertools.product(dists, segment_lengths, errors, num_curves, seeds)
+    ]
+
+
+def run_name(index: int, params: Dict) -> str:
+    """Return the file stem used for the outputs of run ``index``."""
+    return (f"sweep_{index:04d}_dist{params['dist']}_seg{params['segment_length']}"
+            f"_err{params['error']}_n{params['num_curves']}_seed{params['seed']}")
+
+
+def render_curves(curves, canvas_size: int, output_dir: Path, index: int, params: Dict,
+                  cache: Optional[CurveCache] = None, image_key: Optional[str] = None) -> List[str]:
+    """Draw the curves of one run to a PNG and return the file names written.
+    
+    With ``cache`` and ``image_key``, the encoded PNG is reused if present.
+    """
+    output_file = output_dir / f"{run_name(index, params)}.png"
+    
+    data = cache.get_bytes(image_key) if cache is not None else None
+    if data is None:
+        image = Image.new('RGB', (canvas_size, canvas_size), 'white')
+        draw_closed_curves(ImageDraw.Draw(image), curves, COLORS, width=2)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        data = buffer.getvalue()
+        if cache is not None:
+            cache.put_bytes(image_key, data)
+    
+    output_file.write_bytes(data)
+    return [output_file.name]
+
+
+def _init_worker(outer_curve: np.ndarray, nested_curve: Callable, render: Callable,
+                 cache_dir: Optional[str] = None) -> None:
+    """Receive the shared outer curve and callables once per worker process."""
+    global _OUTER_CURVE, _NESTED_CURVE, _RENDER, _CACHE
+    _OUTER_CURVE = [tuple(point) for point in outer_curve.tolist()]
+    _NESTED_CURVE = nested_curve
+    _RENDER = render
+    _CACHE = CurveCache(cache_dir) if cache_dir else None
+
+
+def _next_curve(curve, params: Dict, rng):
+    """Generate the curve inside ``curve`` for one run's parameters."""
+    return _NESTED_CURVE(curve, params['dist'], params['error'], params['segment_length'], rng=rng)
+
+
+def _iter_run(params: Dict, rng) -> Iterator:
+    """Yield the outer curve and then each nested curve of one run."""
+    curve = _OUTER_CURVE
+    yield curve
+    for _ in range(params['num_curves']):
+        curve = _next_curve(curve, params, rng)
+        if curve is None or len(curve) == 0:
+            return
+        yield curve
+
+
+def _run_one(index: int, params: Dict, canvas_size: int, output_dir: str) -> Dict:
+    """Generate and render one parameter set inside a worker."""
+    start = time.perf_counter()
+    
+    render_options = {}
+    rng = random.Random(params['seed'])
+    if _CACHE is not None and params['seed'] is not None:
+        run = run_params(_NESTED_CURVE, canvas_size, None, params['segment_length'],
+                         params['dist'], params['error'], params['seed'], _OUTER_CURVE)
+        curves = resume_curves(_CACHE, run, params['num_curves'] + 1, lambda: _OUTER_CURVE,
+                               lambda curve, rng: _next_curve(curve, params, rng), rng)
+    else:
+        run = None
+        curves = _iter_run(params, rng)
+    
+    curves = [Curve(curve) if isinstance(curve, np.ndarray) else curve for curve in curves]
+    
+    if run is not None and _RENDER is render_curves:
+        style = {'renderer': 'render_curves', 'colors': COLORS, 'width': 2}
+        render_options = {'cache': _CACHE, 'image_key': _CACHE.image_key(run, len(curves), style)}
+    files = _RENDER(curves, canvas_size, Path(output_dir), index, params, **render_options)
+    
+    return {
+        'index': index,
+        'params': params,
+        'curves': len(curves),
+        'total_points': sum(len(curve) for curve in curves),
+        'files': files,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def run_sweep(
+    grid: Sequence[Dict],
+    outer_curve,
+    output_dir,
+    canvas_size: int = 1000,
+    workers: Optional[int] = None,
+    nested_curve: Callable = generate_nested_curve,
+    render: Callable = render_curves,
+    start_index: int = 1,
+    cache_dir=None
+) -> List[Dict]:
+    """Run every parameter set in ``grid`` over a process pool.
+
+    Each run starts from ``outer_curve`` and generates ``num_curves`` nested
+    curves with ``nested_curve(previous, dist, error, segment_length, rng=rng)``,
+    stopping early if one fails. ``render(curves, canvas_size, output_dir,
+    index, params)`` writes the run's files and returns their names; both
+    callables must be importable module-level functions so they can be sent
+    to the workers. Runs are numbered from ``start_index``. With
+    ``cache_dir``, seeded runs read and fill a CurveCache there.
+
+    Writes manifest.json to ``output_dir`` and returns its entries, in grid
+    order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outer = np.asarray(outer_curve, dtype=float)
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(outer, nested_curve, render, str(cache_dir) if cache_dir else None)
+    ) as executor:
+        futures = [
+            executor.submit(_run_one, index, params, canvas_size, str(output_dir))
+            for index, params in enumerate(grid, start_index)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            print(f"[{done}/{len(futures)}] Run {result['index']}: "
+                  f"{result['curves']} curves, {result['total_points']} points "
+                  f"({result['seconds']:.2f}s)")
+
+    results.sort(key=lambda result: result['index'])
+    manifest = {
+        'canvas_size': canvas_size,
+        'outer_curve_points': len(outer),
+        'workers': workers or os.cpu_count(),
+        'seconds': round(time.perf_counter() - start, 3),
+        'runs': results,
+    }
+    with open(output_dir / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest saved to: {output_dir / MANIFEST_NAME}")
+
+    return results
+
+
+def run_single(
+    index: int,
+    params: Dict,
+    outer_curve,
+    output_dir,
+    canvas_size: int = 1000,
+    nested_curve: Callable = generate_nested_curve,
+    render: Callable = render_curves,
+    cache_dir=None
+) -> Dict:
+    """Run one parameter set in this process and return its manifest entry.
+
+    Arguments are as for run_sweep. No pool is started and no manifest is
+    written, so a manifest left in ``output_dir`` by a full sweep is kept.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _init_worker(np.asarray(outer_curve, dtype=float), nested_curve, render,
+                 str(cache_dir) if cache_dir else None)
+    result = _run_one(index, params, canvas_size, str(output_dir))
+    print(f"Run {result['index']}: {result['curves']} curves, {result['total_points']} points "
+          f"({result['seconds']:.2f}s)")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for ``atpoe sweep``."""
+    parser = argparse.ArgumentParser(
+        prog='atpoe sweep',
+        description="Run a grid of AtPoE parameter sets in parallel",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  atpoe sweep --dist 3 5 8 --segment-length 2 3 4 --error 0.5 1.0 --curves 5
+  atpoe sweep --dist 6 --error 1 2 3 4 --seed 0 1 2 --workers 8 --output-dir sweep_out
+        """
+    )
+
+    parser.add_argument('--dist', '-d', type=int, nargs='+', default=[6],
+                        help='Distances between curves in pixels (default: 6)')
+    parser.add_argument('--segment-length', '-l', type=int, nargs='+', default=[3],
+                        help='Segment lengths in pixels (default: 3)')
+    parser.add_argument('--error', '-e', type=float, nargs='+', default=[1.5],
+                        help='Error levels in pixels (default: 1.5)')
+    parser.add_argument('--curves', '-c', type=int, nargs='+', default=[10],
+                        help='Nested curves per run, inside the outer curve (default: 10)')
+    parser.add_argument('--seed', type=int, nargs='+', default=[0],
+                        help='Random seeds, one run per seed (default: 0)')
+    parser.add_argument('--canvas-size', '-s', type=int, default=1000,
+                        help='Canvas size in pixels (default: 1000)')
+    parser.add_argument('--radius', type=float, default=450,
+                        help='Radius of the generated outer circle (default: 450)')
+    parser.add_argument('--outer', type=str,
+                        help='Outer curve coordinate file with one "x,y" per line '
+                             '(default: generated circle)')
+    parser.add_argument('--workers', '-w', type=int,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_DIR), metavar='DIR',
+                        help=f'Reuse curves and images of seeded runs from a cache '
+                             f'(default directory: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--output-dir', '-o', type=str, default='sweep_output',
+                        help='Directory for images and manifest.json (default: sweep_output)')
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.outer:
+            with open(args.outer) as f:
+                outer_curve = [tuple(map(float, line.split(','))) for line in f if line.strip()]
+        else:
+            outer_curve = generate_initial_circle(args.canvas_size, args.radius)
+
+        grid = build_grid(args.dist, args.segment_length, args.error, args.curves, args.seed)
+        print(f"Running {len(grid)} parameter sets...")
+        run_sweep(grid, outer_curve, args.output_dir, args.canvas_size,
+                  args.workers, cache_dir=args.cache)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,7 @@ from PIL import Image, ImageDraw
 import os
 
 from atpoe.core.curve_generator import generate_nested_curve, generate_initial_circle
+from atpoe.graphics.render import draw_closed_curves
 
 
 class InteractiveAtPoE:
@@ -76,18 +77,9 @@ class InteractiveAtPoE:
         
         draw = ImageDraw.Draw(self.current_image)
         
-        # Draw only the new curves in this batch
+        # Draw only the new curves in this batch, one draw call per curve
         start_idx = len(self.curves) - len(curves_batch)
-        
-        for i, curve in enumerate(curves_batch):
-            curve_idx = start_idx + i
-            color = self.colors[curve_idx % len(self.colors)]
-            
-            # Draw the curve
-            for j in range(len(curve)):
-                p1 = curve[j]
-                p2 = curve[(j + 1) % len(curve)]
-                draw.line([p1, p2], fill=color, width=2)
+        draw_closed_curves(draw, curves_batch, self.colors, width=2, start=start_idx)
     
     def save_current_image(self, filename: str = None):
         """Save the current image."""
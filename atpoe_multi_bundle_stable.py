@@ -2,7 +2,7 @@ import streamlit as st
 import math
 import random
 from PIL import Image, ImageDraw
-import io
+from atpoe.graphics.render import PNG_COMPRESS_LEVEL, EncodedOutputs, encode_png
 
 # Simple graphics bundle system
 class SimpleGraphicsBundle:
@@ -21,11 +21,13 @@ def generate_initial_circle(center_x: float, center_y: float, radius: float, num
         points.append((x, y))
     return points
 
-def generate_nested_curve_simple(outer_curve, distance: float, error: float):
+def generate_nested_curve_simple(outer_curve, distance: float, error: float, rng=None):
     """Generate a nested curve by moving points inward with error."""
     if not outer_curve or len(outer_curve) < 3:
         return []
     
+    uniform = (random if rng is None else rng).uniform
+    
     # Calculate center of outer curve
     center_x = sum(p[0] for p in outer_curve) / len(outer_curve)
     center_y = sum(p[1] for p in outer_curve) / len(outer_curve)
@@ -47,8 +49,8 @@ def generate_nested_curve_simple(outer_curve, distance: float, error: float):
         new_y = point[1] - dy * distance
         
         # Add random error
-        error_x = random.uniform(-error, error)
-        error_y = random.uniform(-error, error)
+        error_x = uniform(-error, error)
+        error_y = uniform(-error, error)
         
         new_curve.append((new_x + error_x, new_y + error_y))
     
@@ -93,6 +95,8 @@ def main():
         st.session_state.current_image = None
     if 'bundle_history' not in st.session_state:
         st.session_state.bundle_history = []
+    if 'outputs' not in st.session_state:
+        st.session_state.outputs = EncodedOutputs()
     
     # Simple bundle options
     bundle_options = [
@@ -208,6 +212,7 @@ def main():
                 st.session_state.all_curves.append(bundle_curves)
                 st.session_state.current_image = image
                 st.session_state.bundle_history.append((selected_bundle.name, num_curves))
+                st.session_state.outputs.changed()
                 
                 st.success(f"✅ Added {num_curves} curves with '{selected_bundle.name}' bundle!")
                 
@@ -218,23 +223,23 @@ def main():
             st.session_state.all_curves = []
             st.session_state.current_image = None
             st.session_state.bundle_history = []
+            st.session_state.outputs.changed()
             st.info("🗑️ All curves cleared!")
         
         # Display current image
         if st.session_state.current_image:
             st.image(st.session_state.current_image, use_container_width=True)
             
-            # Download buttons
+            # Download buttons; the PNG is encoded once per image revision,
+            # not on every rerun
+            image = st.session_state.current_image
+            png_level = st.slider("PNG Compression", 0, 9, PNG_COMPRESS_LEVEL, key="png_level_slider",
+                                  help="0 is fastest, 9 gives the smallest file")
             col_dl1, col_dl2 = st.columns(2)
             with col_dl1:
-                # Convert PIL image to bytes for download
-                img_buffer = io.BytesIO()
-                st.session_state.current_image.save(img_buffer, format='PNG')
-                img_buffer.seek(0)
-                
                 st.download_button(
                     label="📥 Download PNG",
-                    data=img_buffer.getvalue(),
+                    data=st.session_state.outputs.get(('png', png_level), lambda: encode_png(image, png_level)),
                     file_name=f"atpoe_multi_bundle_{len(st.session_state.bundle_history)}_bundles.png",
                     mime="image/png"
                 )
@@ -8,54 +8,27 @@ import streamlit as st
 import math
 import random
 from PIL import Image, ImageDraw
-import io
 import os
 from typing import List, Tuple, Optional
 
 # Import our graphics bundle system
 from graphics_bundle import BundleLibrary, GraphicsBundle, StrokeStyle
 from collision_detector import IncrementalCollisionDetector
-
-
-def generate_initial_circle(canvas_size: int, radius: int, segment_length: int = 3) -> List[Tuple[float, float]]:
-    """Generate initial circle centered at canvas center with fixed segment length."""
-    center_x = canvas_size // 2
-    center_y = canvas_size // 2
-    
-    points = []
-    start_point = (center_x + radius, center_y)
-    current_point = start_point
-    points.append(current_point)
-    
-    while True:
-        dx = current_point[0] - center_x
-        dy = current_point[1] - center_y
-        
-        angle_step = segment_length / radius
-        cos_step = math.cos(angle_step)
-        sin_step = math.sin(angle_step)
-        
-        new_x = center_x + dx * cos_step - dy * sin_step
-        new_y = center_y + dx * sin_step + dy * cos_step
-        
-        new_point = (new_x, new_y)
-        points.append(new_point)
-        
-        distance_to_start = math.hypot(new_x - start_point[0], new_y - start_point[1])
-        if distance_to_start <= segment_length and len(points) > 10:
-            break
-        
-        current_point = new_point
-    
-    return points
+from atpoe.core.curve_generator import generate_initial_circle
+from atpoe.core.nearest import NearestPointIndex
+from atpoe.graphics.render import PNG_COMPRESS_LEVEL, IncrementalCanvas, draw_closed_curve
+from atpoe.graphics.svg import svg_string
 
 
 def generate_nested_curve(outer_curve: List[Tuple[float, float]], 
-                         length: int, error: float, segment_length: int = 3) -> Optional[List[Tuple[float, float]]]:
-    """Generate a nested curve inside the outer curve."""
+                         length: int, error: float, segment_length: int = 3,
+                         rng=None) -> Optional[List[Tuple[float, float]]]:
+    """Generate a nested curve inside the outer curve, drawing errors from rng if given."""
     if len(outer_curve) < 3:
         return None
     
+    uniform = (random if rng is None else rng).uniform
+    
     center_x = sum(x for x, y in outer_curve) / len(outer_curve)
     center_y = sum(y for x, y in outer_curve) / len(outer_curve)
     
@@ -82,22 +55,17 @@ def generate_nested_curve(outer_curve: List[Tuple[float, float]],
     dx = dx / dist * length
     dy = dy / dist * length
     
-    error_x = random.uniform(-error, error)
-    error_y = random.uniform(-error, error)
+    error_x = uniform(-error, error)
+    error_y = uniform(-error, error)
     
     start_point = (ox + dx + error_x, oy + dy + error_y)
     current_point = start_point
     new_curve.append(current_point)
     
+    outer_index = NearestPointIndex(outer_curve, cell_size=max(length, segment_length))
+    
     while True:
-        min_dist = float('inf')
-        closest_outer_point = None
-        
-        for ox, oy in outer_curve:
-            dist = math.hypot(current_point[0] - ox, current_point[1] - oy)
-            if dist < min_dist:
-                min_dist = dist
-                closest_outer_point = (ox, oy)
+        closest_outer_point = outer_index.nearest(current_point)
         
         if not closest_outer_point:
             break
@@ -110,8 +78,8 @@ def generate_nested_curve(outer_curve: List[Tuple[float, float]],
         dx = dx / dist * length
         dy = dy / dist * length
         
-        error_x = random.uniform(-error, error)
-        error_y = random.uniform(-error, error)
+        error_x = uniform(-error, error)
+        error_y = uniform(-error, error)
         
         total_dx = dx + error_x
         total_dy = dy + error_y
@@ -132,31 +100,37 @@ def generate_nested_curve(outer_curve: List[Tuple[float, float]],
     return new_curve
 
 
-def draw_curves_with_bundle(curves: List[List[Tuple[float, float]]], 
-                          bundle: GraphicsBundle, 
-                          canvas_size: int = 1000) -> Image.Image:
-    """Draw curves using the specified graphics bundle."""
-    img = Image.new('RGB', (canvas_size, canvas_size), 'white')
-    draw = ImageDraw.Draw(img)
+def draw_curve_with_bundle(draw: ImageDraw.ImageDraw, curve: List[Tuple[float, float]],
+                           bundle: GraphicsBundle) -> None:
+    """Draw one closed curve using the specified graphics bundle."""
+    if len(curve) < 2:
+        return
     
-    for curve in curves:
-        if len(curve) < 2:
-            continue
-        
-        for j in range(len(curve)):
-            p1 = curve[j]
-            p2 = curve[(j + 1) % len(curve)]
-            
-            if bundle.stroke_style == StrokeStyle.DASHED and j % 2 == 0:
-                draw.line([p1, p2], fill=bundle.color, width=bundle.width)
-            elif bundle.stroke_style == StrokeStyle.DOTTED and j % 3 == 0:
-                draw.line([p1, p2], fill=bundle.color, width=bundle.width)
-            elif bundle.stroke_style == StrokeStyle.DASH_DOT and j % 4 < 2:
-                draw.line([p1, p2], fill=bundle.color, width=bundle.width)
-            elif bundle.stroke_style == StrokeStyle.SOLID:
-                draw.line([p1, p2], fill=bundle.color, width=bundle.width)
+    if bundle.stroke_style == StrokeStyle.SOLID:
+        draw_closed_curve(draw, curve, bundle.color, bundle.width)
+        return
+    
+    for j in range(len(curve)):
+        p1 = curve[j]
+        p2 = curve[(j + 1) % len(curve)]
+        
+        if bundle.stroke_style == StrokeStyle.DASHED and j % 2 == 0:
+            draw.line([p1, p2], fill=bundle.color, width=bundle.width)
+        elif bundle.stroke_style == StrokeStyle.DOTTED and j % 3 == 0:
+            draw.line([p1, p2], fill=bundle.color, width=bundle.width)
+        elif bundle.stroke_style == StrokeStyle.DASH_DOT and j % 4 < 2:
+            draw.line([p1, p2], fill=bundle.color, width=bundle.width)
+
+
+def render_new_curves(curves: List[List[Tuple[float, float]]], 
+                      bundle: GraphicsBundle, canvas_size: int) -> Image.Image:
+    """Draw the curves added since the last render onto the session canvas."""
+    canvas = st.session_state.get('canvas')
+    if canvas is None or canvas.size != (canvas_size, canvas_size):
+        canvas = st.session_state.canvas = IncrementalCanvas(canvas_size)
     
-    return img
+    style = (bundle.color, bundle.width, bundle.stroke_style)
+    return canvas.update(curves, lambda draw, curve: draw_curve_with_bundle(draw, curve, bundle), style)
 
 
 def main():
@@ -175,6 +149,8 @@ def main():
         st.session_state.curves = []
     if 'current_image' not in st.session_state:
         st.session_state.current_image = None
+    if 'canvas' not in st.session_state:
+        st.session_state.canvas = None
     
     # Sidebar for controls
     with st.sidebar:
@@ -230,6 +206,7 @@ def main():
             if st.button("🗑️ Clear All"):
                 st.session_state.curves = []
                 st.session_state.current_image = None
+                st.session_state.canvas = None
                 st.rerun()
         
         # Batch Generation
@@ -248,23 +225,27 @@ def main():
         if st.session_state.current_image:
             st.image(st.session_state.current_image, use_column_width=True)
             
-            # Download buttons
+            # Download buttons; each file is encoded once per image revision,
+            # not on every rerun
+            png_level = st.slider("PNG Compression", 0, 9, PNG_COMPRESS_LEVEL,
+                                  help="0 is fastest, 9 gives the smallest file")
+            canvas = st.session_state.canvas
             col1, col2 = st.columns(2)
             
             with col1:
-                img_byte_arr = io.BytesIO()
-                st.session_state.current_image.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                
                 st.download_button(
                     label="📥 Download PNG",
-                    data=img_byte_arr,
+                    data=canvas.png_bytes(png_level),
                     file_name=f"atpoe_curves_{len(st.session_state.curves)}.png",
                     mime="image/png"
                 )
             
             with col2:
-                svg_content = create_svg(st.session_state.curves, selected_bundle, canvas_size)
+                svg_style = ('svg', selected_bundle.color, selected_bundle.width,
+                             selected_bundle.stroke_style, canvas_size)
+                svg_content = canvas.outputs.get(
+                    svg_style, lambda: create_svg(st.session_state.curves, selected_bundle, canvas_size)
+                )
                 st.download_button(
                     label="📥 Download SVG",
                     data=svg_content,
@@ -317,8 +298,9 @@ def generate_curves(num_curves: int, segment_length: int, error_level: float,
         # Store in session state
         st.session_state.curves = curves
         
-        # Draw and store image
-        st.session_state.current_image = draw_curves_with_bundle(curves, bundle, canvas_size)
+        # Draw and store image on a fresh canvas
+        st.session_state.canvas = None
+        st.session_state.current_image = render_new_curves(curves, bundle, canvas_size)
         
         st.success(f"Generated {len(curves)} curves successfully!")
         st.rerun()
@@ -345,7 +327,8 @@ def add_batch(batch_size: int, segment_length: int, error_level: float,
         
         # Update session state
         st.session_state.curves = curves
-        st.session_state.current_image = draw_curves_with_bundle(curves, bundle, canvas_size)
+        # Only the new curves are drawn onto the existing canvas
+        st.session_state.current_image = render_new_curves(curves, bundle, canvas_size)
         
         st.success(f"Added {len(curves) - len(st.session_state.curves) + batch_size} curves!")
         st.rerun()
@@ -353,32 +336,16 @@ def add_batch(batch_size: int, segment_length: int, error_level: float,
 
 def create_svg(curves: List[List[Tuple[float, float]]], bundle: GraphicsBundle, canvas_size: int) -> str:
     """Create SVG content for the curves."""
-    svg_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{canvas_size}" height="{canvas_size}" xmlns="http://www.w3.org/2000/svg">
-  <rect width="{canvas_size}" height="{canvas_size}" fill="white"/>
-"""
-    
-    for curve in curves:
-        if len(curve) < 2:
-            continue
-        
-        path_data = f"M {curve[0][0]} {curve[0][1]}"
-        for point in curve[1:]:
-            path_data += f" L {point[0]} {point[1]}"
-        path_data += " Z"
-        
-        stroke_dasharray = ""
-        if bundle.stroke_style == StrokeStyle.DASHED:
-            stroke_dasharray = f'stroke-dasharray="{bundle.width * 2},{bundle.width}"'
-        elif bundle.stroke_style == StrokeStyle.DOTTED:
-            stroke_dasharray = f'stroke-dasharray="{bundle.width},{bundle.width}"'
-        elif bundle.stroke_style == StrokeStyle.DASH_DOT:
-            stroke_dasharray = f'stroke-dasharray="{bundle.width * 3},{bundle.width},{bundle.width},{bundle.width}"'
-        
-        svg_content += f'  <path d="{path_data}" stroke="{bundle.color}" stroke-width="{bundle.width}" fill="none" {stroke_dasharray}/>\n'
+    stroke_dasharray = None
+    if bundle.stroke_style == StrokeStyle.DASHED:
+        stroke_dasharray = f"{bundle.width * 2},{bundle.width}"
+    elif bundle.stroke_style == StrokeStyle.DOTTED:
+        stroke_dasharray = f"{bundle.width},{bundle.width}"
+    elif bundle.stroke_style == StrokeStyle.DASH_DOT:
+        stroke_dasharray = f"{bundle.width * 3},{bundle.width},{bundle.width},{bundle.width}"
     
-    svg_content += "</svg>"
-    return svg_content
+    return svg_string(curves, canvas_size, colors=[bundle.color], stroke_width=bundle.width,
+                      stroke_dasharray=stroke_dasharray)
 
 
 if __name__ == "__main__":
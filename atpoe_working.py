@@ -3,6 +3,9 @@ import math
 import random
 from PIL import Image, ImageDraw
 import io
+from atpoe.core.resample import mean_spacing, resample_curve
+from atpoe.graphics.render import PNG_COMPRESS_LEVEL, EncodedOutputs, encode_png
+from atpoe.graphics.svg import SVGWriter
 
 # Simple graphics bundle system
 class SimpleGraphicsBundle:
@@ -21,11 +24,13 @@ def generate_initial_circle(center_x: float, center_y: float, radius: float, num
         points.append((x, y))
     return points
 
-def generate_nested_curve_simple(outer_curve, distance: float, error: float, min_separation: float = 1.0):
+def generate_nested_curve_simple(outer_curve, distance: float, error: float, min_separation: float = 1.0, rng=None):
     """Generate a nested curve by moving points inward with error, ensuring minimum separation."""
     if not outer_curve or len(outer_curve) < 3:
         return []
     
+    uniform = (random if rng is None else rng).uniform
+    
     # Calculate center of outer curve
     center_x = sum(p[0] for p in outer_curve) / len(outer_curve)
     center_y = sum(p[1] for p in outer_curve) / len(outer_curve)
@@ -49,11 +54,11 @@ def generate_nested_curve_simple(outer_curve, distance: float, error: float, min
         
         # Add random error (but less for first and last points to ensure closure)
         if i == 0 or i == len(outer_curve) - 1:
-            error_x = random.uniform(-error * 0.2, error * 0.2)
-            error_y = random.uniform(-error * 0.2, error * 0.2)
+            error_x = uniform(-error * 0.2, error * 0.2)
+            error_y = uniform(-error * 0.2, error * 0.2)
         else:
-            error_x = random.uniform(-error, error)
-            error_y = random.uniform(-error, error)
+            error_x = uniform(-error, error)
+            error_y = uniform(-error, error)
         
         new_curve.append((new_x + error_x, new_y + error_y))
     
@@ -107,6 +112,20 @@ def draw_curves_simple(draw, curves, bundle):
             end_point = curve[i + 1]
             draw.line([start_point, end_point], fill=color, width=int(bundle.width))
 
+def create_svg(all_curves, bundle_styles, canvas_size):
+    """Write every bundle's curves as SVG paths in the bundle's colour and width.
+    
+    Paths are streamed from the stored coordinates, all points kept, in the
+    order they were drawn; nothing is rasterized.
+    """
+    buffer = io.StringIO()
+    with SVGWriter(buffer, canvas_size) as svg:
+        for curves, (color, width) in zip(all_curves, bundle_styles):
+            # Curves repeat their first point, so draw them open like the PNG
+            svg.write_curves(curves, [color], stroke_width=width, closed=False,
+                             stroke_linejoin="round")
+    return buffer.getvalue()
+
 def main():
     st.set_page_config(page_title="AtPoE - Multi-Bundle Stable", page_icon="🎨", layout="wide")
     st.title("🎨 AtPoE - Multi-Bundle Interactive Curve Generator")
@@ -119,6 +138,10 @@ def main():
         st.session_state.current_image = None
     if 'bundle_history' not in st.session_state:
         st.session_state.bundle_history = []
+    if 'bundle_styles' not in st.session_state:
+        st.session_state.bundle_styles = []
+    if 'outputs' not in st.session_state:
+        st.session_state.outputs = EncodedOutputs()
     
     # Sidebar for all controls
     with st.sidebar:
@@ -152,7 +175,8 @@ def main():
         num_curves = st.slider("Number of Curves", 1, 30, 3, key="curves_slider")
         error_level = st.slider("Error Level", 0.0, 6.0, 1.5, 0.1, key="error_slider")
         curve_distance = st.slider("Curve Separation", 0.0, 15.0, 8.0, 0.1, key="distance_slider")
-        segment_length = st.slider("Segment Length", 1.0, 15.0, 3.0, 0.1, key="segment_slider")
+        segment_length = st.slider("Minimum Segment Length", 1.0, 15.0, 3.0, 0.1, key="segment_slider",
+                                   help="Curves keep their start curve's point spacing, or this length if it is longer")
         min_inter_curve = st.slider("Minimum Inter-Curve", 1.0, 4.0, 1.0, 0.1, key="inter_curve_slider")
         canvas_size = st.selectbox("Canvas Size", [800, 1000, 1200, 1500], index=1, key="canvas_slider")
         
@@ -215,6 +239,9 @@ def main():
                 
                 # Generate curves for this bundle, starting from the last curve
                 bundle_curves = []
+                # Keep the start curve's spacing (never finer than the slider)
+                # so resampling does not multiply the vertex count
+                spacing = max(segment_length, mean_spacing(start_curve))
                 
                 for i in range(num_curves):
                     if i == 0:
@@ -249,6 +276,8 @@ def main():
                                 )
                         
                         if curve:
+                            # Respace the points so their count follows the perimeter
+                            curve = resample_curve(curve, spacing)
                             bundle_curves.append(curve)
                 
                 # Draw curves with current bundle
@@ -256,8 +285,10 @@ def main():
                 
                 # Update session state
                 st.session_state.all_curves.append(bundle_curves)
+                st.session_state.bundle_styles.append((selected_bundle.color, selected_bundle.width))
                 st.session_state.current_image = image
                 st.session_state.bundle_history.append((selected_bundle.name, num_curves))
+                st.session_state.outputs.changed()
                 
                 st.success(f"✅ Added {num_curves} curves with '{selected_bundle.name}' bundle!")
                 
@@ -268,6 +299,8 @@ def main():
             st.session_state.all_curves = []
             st.session_state.current_image = None
             st.session_state.bundle_history = []
+            st.session_state.bundle_styles = []
+            st.session_state.outputs.changed()
             st.info("🗑️ All curves cleared!")
         
         # Display current image
@@ -284,7 +317,7 @@ def main():
                 Curves: {num_curves}<br>
                 Error: {error_level}<br>
                 Separation: {curve_distance}<br>
-                Segment Length: {segment_length}<br>
+                Min Segment Length: {segment_length}<br>
                 Min Inter-Curve: {min_inter_curve}<br>
                 Width: {line_width}<br>
                 Color: {fill_color}
@@ -302,31 +335,28 @@ def main():
             # File name input
             file_name = st.text_input("File Name", value=f"atpoe_curves_{len(st.session_state.bundle_history)}_bundles", key="file_name_input")
             
-            # Download buttons
+            # Download buttons; only the selected file type is encoded, once
+            # per image revision rather than on every rerun
+            image = st.session_state.current_image
+            outputs = st.session_state.outputs
             col_dl1, col_dl2 = st.columns(2)
             with col_dl1:
                 if file_type == "PNG":
-                    # Convert PIL image to bytes for download
-                    img_buffer = io.BytesIO()
-                    st.session_state.current_image.save(img_buffer, format='PNG')
-                    img_buffer.seek(0)
+                    png_level = st.slider("PNG Compression", 0, 9, PNG_COMPRESS_LEVEL, key="png_level_slider",
+                                          help="0 is fastest, 9 gives the smallest file")
                     
                     st.download_button(
                         label="📥 Download PNG",
-                        data=img_buffer.getvalue(),
+                        data=outputs.get(('png', png_level), lambda: encode_png(image, png_level)),
                         file_name=f"{file_name}.png",
                         mime="image/png"
                     )
                 else:  # SVG
-                    # For now, we'll save as PNG but with SVG extension
-                    # TODO: Implement proper SVG generation
-                    img_buffer = io.BytesIO()
-                    st.session_state.current_image.save(img_buffer, format='PNG')
-                    img_buffer.seek(0)
-                    
                     st.download_button(
                         label="📥 Download SVG",
-                        data=img_buffer.getvalue(),
+                        data=outputs.get('svg', lambda: create_svg(
+                            st.session_state.all_curves, st.session_state.bundle_styles, image.width
+                        )),
                         file_name=f"{file_name}.svg",
                         mime="image/svg+xml"
                     )
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+benchmarks/run_benchmarks.py - Timing and memory benchmarks for the hot paths
+
+Times the curve pipeline across curve counts, segment lengths and canvas
+sizes:
+- initial_circle: generate_initial_circle, with its memo cache cleared
+- nested_curve: one generate_nested_curve call
+- step6_tracking: the nearest-outer-point lookup that step6-style
+  generators make at every step, for each point of the next curve
+- nested_series: a whole run of nested curves with iter_nested_curves
+- contour_series: the same run with iter_contour_curves
+- deposition: deposit_layers growing raster bands across canvas sizes
+- check_collision: IncrementalCollisionDetector.check_collision for every
+  segment of the next curve, against the curves stored so far
+- draw_curves: draw_curves to a PNG file
+- fill_bands: render_curves with the bands between the curves filled
+- draw_tiled: draw_curves rendering and writing the PNG tile by tile
+- svg_export: save_svg, with and without simplification
+
+Each case is run ``--repeat`` times after its inputs are built; the minimum
+and median wall times are recorded. Peak memory is measured in one more,
+untimed run under tracemalloc, which sees Python and NumPy allocations but
+not Pillow's image buffers. Inputs are generated with a fixed seed, so
+every run measures the same work.
+
+Usage:
+    python benchmarks/run_benchmarks.py run --output before.json
+    python benchmarks/run_benchmarks.py run --output after.json --filter draw_curves
+    python benchmarks/run_benchmarks.py compare before.json after.json
+
+compare exits with status 1 when a case got slower or used more memory
+than the threshold allows, so it can gate a change.
+"""
+
+import argparse
+import contextlib
+import functools
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import PIL
+
+from atpoe.core import curve_generator
+from atpoe.core.contour import iter_contour_curves
+from atpoe.core.curve_generator import draw_curves, generate_initial_circle, generate_nested_curve, iter_nested_curves
+from atpoe.core.deposition import deposit_layers
+from atpoe.core.nearest import NearestPointIndex
+from atpoe.graphics.render import render_curves
+from atpoe.graphics.svg import DEFAULT_TOLERANCE, save_svg
+from collision_detector import IncrementalCollisionDetector
+
+# Parameters of the generated input curves
+DISTANCE = 6
+ERROR = 1.5
+SEED = 0
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.15
+
+
+class Case(NamedTuple):
+    """One benchmark: ``setup()`` builds the inputs and returns the callable to time."""
+    group: str
+    params: Dict
+    setup: Callable[[], Callable[[], object]]
+
+    @property
+    def name(self) -> str:
+        return f"{self.group}[{','.join(f'{k}={v}' for k, v in self.params.items())}]"
+
+
+def radius_for(canvas_size: int) -> float:
+    """Outer circle radius used for a canvas, as in the CLI (450 on 1000)."""
+    return canvas_size * 0.45
+
+
+@functools.lru_cache(maxsize=None)
+def input_curves(num_curves: int, segment_length: int = 3, canvas_size: int = 1000) -> tuple:
+    """Return a seeded run of ``num_curves`` curves (the circle included)."""
+    rng = random.Random(SEED)
+    return tuple(iter_nested_curves(
+        num_curves, DISTANCE, ERROR, segment_length,
+        canvas_size=canvas_size, radius=radius_for(canvas_size), rng=rng
+    ))
+
+
+def _initial_circle(canvas_size, segment_length):
+    def setup():
+        curve_generator._circle_points.cache_clear()
+        return lambda: generate_initial_circle(canvas_size, radius_for(canvas_size), segment_length)
+    return setup
+
+
+def _nested_curve(segment_length):
+    def setup():
+        outer = input_curves(1, segment_length)[0]
+        return lambda: generate_nested_curve(outer, DISTANCE, ERROR, segment_length, rng=random.Random(SEED))
+    return setup
+
+
+def _step6_tracking(segment_length):
+    # step6_final_version.generate_nested_curve itself only stops when it
+    # happens to return to its start, so its per-step lookup is timed instead
+    def setup():
+        outer, inner = input_curves(2, segment_length)
+        index = NearestPointIndex(outer, cell_size=max(DISTANCE, segment_length))
+        return lambda: [index.nearest(point) for point in inner]
+    return setup
+
+
+def _nested_series(num_curves):
+    def setup():
+        return lambda: list(iter_nested_curves(num_curves, DISTANCE, ERROR, 3, rng=random.Random(SEED)))
+    return setup
+
+
+def _contour_series(num_curves):
+    def setup():
+        return lambda: list(iter_contour_curves(num_curves, DISTANCE, ERROR, 3, rng=random.Random(SEED)))
+    return setup
+
+
+def _deposition(canvas_size, num_layers):
+    def setup():
+        return lambda: deposit_layers(num_layers, 2, canvas_size, radius_for(canvas_size))
+    return setup
+
+
+def _check_collision(num_curves):
+    def setup():
+        curves = input_curves(num_curves + 1)
+        detector = IncrementalCollisionDetector(segment_length=3)
+        for curve in curves[:-1]:
+            detector.add_segments(curve)
+        query = curves[-1]
+        segments = [(query[i], query[(i + 1) % len(query)]) for i in range(len(query))]
+        return lambda: [detector.check_collision(p1, p2) for p1, p2 in segments]
+    return setup
+
+
+def _draw_curves(canvas_size, num_curves, antialias, output_dir):
+    def setup():
+        curves = input_curves(num_curves, 3, canvas_size)
+        output_file = os.path.join(output_dir, 'draw_curves.png')
+        return lambda: draw_curves(curves, canvas_size, output_file, antialias=antialias)
+    return setup
+
+
+def _fill_bands(canvas_size, num_curves):
+    def setup():
+        curves = input_curves(num_curves, 3, canvas_size)
+        return lambda: render_curves(curves, canvas_size, ['black'], fill_colors=['lightgray', 'lightblue'])
+    return setup
+
+
+def _draw_tiled(canvas_size, num_curves, tile_size, output_dir):
+    def setup():
+        curves = input_curves(num_curves, 3, canvas_size)
+        output_file = os.path.join(output_dir, 'draw_tiled.png')
+        return lambda: draw_curves(curves, canvas_size, output_file, tile_size=tile_size)
+    return setup
+
+
+def _svg_export(num_curves, tolerance, output_dir):
+    def setup():
+        curves = input_curves(num_curves)
+        output_file = os.path.join(output_dir, 'export.svg')
+        return lambda: save_svg(curves, 1000, output_file, tolerance=tolerance)
+    return setup
+
+
+def build_cases(output_dir: str) -> List[Case]:
+    """Return every benchmark case, writing file outputs to ``output_dir``."""
+    cases = []
+    for canvas_size in (1000, 3000):
+        for segment_length in (2, 3, 6):
+            cases.append(Case('initial_circle', {'canvas_size': canvas_size, 'segment_length': segment_length},
+                              _initial_circle(canvas_size, segment_length)))
+    for segment_length in (2, 3, 6):
+        cases.append(Case('nested_curve', {'segment_length': segment_length}, _nested_curve(segment_length)))
+    for segment_length in (2, 3, 6):
+        cases.append(Case('step6_tracking', {'segment_length': segment_length}, _step6_tracking(segment_length)))
+    for num_curves in (5, 20, 100):
+        cases.append(Case('nested_series', {'curves': num_curves}, _nested_series(num_curves)))
+    for num_curves in (20, 100):
+        cases.append(Case('contour_series', {'curves': num_curves}, _contour_series(num_curves)))
+    for canvas_size, num_layers in ((1000, 100), (4000, 400)):
+        cases.append(Case('deposition', {'canvas_size': canvas_size, 'layers': num_layers},
+                          _deposition(canvas_size, num_layers)))
+    for num_curves in (5, 20):
+        cases.append(Case('check_collision', {'curves': num_curves}, _check_collision(num_curves)))
+    for canvas_size in (1000, 2000):
+        for num_curves in (10, 40):
+            cases.append(Case('draw_curves', {'canvas_size': canvas_size, 'curves': num_curves, 'antialias': False},
+                              _draw_curves(canvas_size, num_curves, False, output_dir)))
+    cases.append(Case('draw_curves', {'canvas_size': 1000, 'curves': 40, 'antialias': True},
+                      _draw_curves(1000, 40, True, output_dir)))
+    for canvas_size in (2000, 6000):
+        cases.append(Case('draw_tiled', {'canvas_size': canvas_size, 'curves': 40, 'tile_size': 512},
+                          _draw_tiled(canvas_size, 40, 512, output_dir)))
+    for num_curves in (40, 100):
+        cases.append(Case('fill_bands', {'canvas_size': 2000, 'curves': num_curves},
+                          _fill_bands(2000, num_curves)))
+    for num_curves in (10, 40):
+        for tolerance in (0.0, DEFAULT_TOLERANCE):
+            cases.append(Case('svg_export', {'curves': num_curves, 'tolerance': tolerance},
+                              _svg_export(num_curves, tolerance, output_dir)))
+    return cases
+
+
+def measure(case: Case, repeat: int) -> Dict:
+    """Time ``case`` ``repeat`` times and measure its peak traced memory once."""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            run = case.setup()
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+            finally:
+                gc.enable()
+
+        run = case.setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'name': case.name,
+        'group': case.group,
+        'params': case.params,
+        'repeat': repeat,
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_bytes': peak,
+    }
+
+
+def run_benchmarks(repeat: int = DEFAULT_REPEAT, name_filter: str = '') -> Dict:
+    """Run the benchmark cases whose name contains ``name_filter``."""
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        cases = [case for case in build_cases(output_dir) if name_filter in case.name]
+        for number, case in enumerate(cases, 1):
+            result = measure(case, repeat)
+            results.append(result)
+            print(f"[{number}/{len(cases)}] {case.name}: {result['min_s'] * 1e3:.2f} ms min, "
+                  f"{result['median_s'] * 1e3:.2f} ms median, {result['peak_bytes'] / 1e6:.2f} MB peak")
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Print a comparison table and return the names of regressed cases.
+
+    A case regresses when its minimum time or its peak memory grew by more
+    than ``threshold`` (a fraction) over the baseline. The minimum is used
+    for time because it is the least disturbed by other load.
+    """
+    base = {result['name']: result for result in baseline['results']}
+    regressions = []
+
+    print(f"{'case':<64} {'base ms':>10} {'now ms':>10} {'time':>8} {'memory':>8}")
+    for result in current['results']:
+        name = result['name']
+        if name not in base:
+            print(f"{name:<64} {'-':>10} {result['min_s'] * 1e3:>10.2f} {'new':>8}")
+            continue
+
+        old = base[name]
+        time_change = result['min_s'] / old['min_s'] - 1 if old['min_s'] else 0.0
+        memory_change = result['peak_bytes'] / old['peak_bytes'] - 1 if old['peak_bytes'] else 0.0
+        regressed = time_change > threshold or memory_change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<64} {old['min_s'] * 1e3:>10.2f} {result['min_s'] * 1e3:>10.2f} "
+              f"{time_change:>+8.0%} {memory_change:>+8.0%}{'  REGRESSION' if regressed else ''}")
+
+    missing = set(base) - {result['name'] for result in current['results']}
+    if missing:
+        print(f"\n{len(missing)} baseline case(s) not in the current results")
+
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None) -> None:
+    """Command line entry point: run or compare benchmarks."""
+    parser = argparse.ArgumentParser(description="AtPoE hot path benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and save the results as JSON')
+    run_parser.add_argument('--output', '-o', default='benchmark_results.json',
+                            help='Results file (default: benchmark_results.json)')
+    run_parser.add_argument('--repeat', '-r', type=int, default=DEFAULT_REPEAT,
+                            help=f'Timed runs per case (default: {DEFAULT_REPEAT})')
+    run_parser.add_argument('--filter', '-k', default='',
+                            help='Only run cases whose name contains this text')
+
+    compare_parser = commands.add_parser('compare', help='Compare two results files')
+    compare_parser.add_argument('baseline', help='Results file to compare against')
+    compare_parser.add_argument('current', help='New results file')
+    compare_parser.add_argument('--threshold', '-t', type=float, default=DEFAULT_THRESHOLD,
+                                help=f'Allowed growth in time or memory, as a fraction '
+                                     f'(default: {DEFAULT_THRESHOLD})')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.repeat, args.filter)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        if compare_results(baseline, current, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
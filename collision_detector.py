@@ -1,30 +1,193 @@
 #!/usr/bin/env python3
 """
 Collision Detection System for AtPoE curves.
+
+Stored segments are bucketed in a uniform grid whose cell size is tied to
+the curve segment length, so a query only tests the segments in the cells
+it passes through instead of every stored segment. A segment is walked
+column by column, so a long diagonal one (such as a drawn curve's closing
+chord) covers a strip of cells along itself, not its whole bounding box.
+
+Whole candidate curves are checked in one vectorized sweep: stored segments
+are kept sorted by their minimum x, each query segment selects its x-range
+with searchsorted, the candidate pairs are pruned by bounding box and the
+survivors go through the same orientation test as check_collision. The
+block walk and vectorized test are shared with atpoe.core.validation. The
+x-range is widened by the widest stored segment, so the few segments much
+wider than a grid cell (such as a drawn curve's closing chord) are kept
+out of the sorted run and paired with every query segment instead.
 """
 
-from typing import List, Tuple, Optional
+import math
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple, Optional
+
+import numpy as np
+
+from atpoe.core.validation import closed_segments, do_lines_intersect_array, iter_pair_blocks
+
+# Stored segments wider than this many grid cells bypass the sorted sweep
+WIDE_SEGMENT_CELLS = 4
+
+# Margin, in cells, added to the rows a segment covers in each column so
+# that rounding never drops the cell where two segments meet
+CELL_MARGIN = 1e-6
+
+
+# Columns of the sweep table: the segment, then its bounding box
+_X1, _Y1, _X2, _Y2, _X_MIN, _X_MAX, _Y_MIN, _Y_MAX = range(8)
 
 
 class IncrementalCollisionDetector:
-    def __init__(self):
+    def __init__(self, segment_length: float = 3, cell_size: Optional[float] = None):
         self.segments = []
+        self.cell_size = float(cell_size or segment_length)
+        if self.cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {self.cell_size}")
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._clear_sweep()
     
     def add_segments(self, curve: List[Tuple[float, float]]):
         if len(curve) < 2:
             return
         
+        self._merge_sweep(closed_segments(curve))
+        
         for i in range(len(curve)):
             p1 = curve[i]
             p2 = curve[(i + 1) % len(curve)]
+            index = len(self.segments)
             self.segments.append((p1, p2))
+            for cell in self._cells(p1, p2):
+                self.grid[cell].append(index)
     
     def check_collision(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> bool:
-        for seg_p1, seg_p2 in self.segments:
+        for index in self._candidates(p1, p2):
+            seg_p1, seg_p2 = self.segments[index]
             if self._do_segments_intersect(p1, p2, seg_p1, seg_p2):
                 return True
         return False
     
+    def check_curve(self, curve: List[Tuple[float, float]]) -> Optional[int]:
+        """Return the index of the first segment of curve that collides, or None.
+        
+        Segment i runs from curve[i] to curve[(i + 1) % len(curve)], the same
+        convention add_segments uses for stored curves.
+        """
+        for colliding in self._sweep_curve(curve):
+            if len(colliding):
+                return int(colliding.min())
+        return None
+    
+    def count_collisions(self, curve: List[Tuple[float, float]]) -> int:
+        """Return how many segments of curve collide with a stored segment."""
+        hits = np.zeros(len(curve), dtype=bool)
+        for colliding in self._sweep_curve(curve):
+            hits[colliding] = True
+        return int(hits.sum())
+    
+    def _clear_sweep(self) -> None:
+        # Stored segments as rows of the sweep table: the first _narrow sorted
+        # by minimum x, then those wider than WIDE_SEGMENT_CELLS grid cells,
+        # which are checked against every query segment
+        self._table = np.empty((0, 8), dtype=float)
+        self._narrow = 0
+        self._max_width = 0.0
+    
+    def _merge_sweep(self, segments: np.ndarray) -> None:
+        """Merge new (N, 4) segments into the sweep table.
+        
+        The table is one (N, 8) float array next to the grid and the
+        segments list, so each stored segment takes 64 more bytes; every
+        merge copies it once (O(N)), without sorting the stored part again.
+        """
+        rows = np.hstack([
+            segments,
+            np.minimum(segments[:, 0:1], segments[:, 2:3]),
+            np.maximum(segments[:, 0:1], segments[:, 2:3]),
+            np.minimum(segments[:, 1:2], segments[:, 3:4]),
+            np.maximum(segments[:, 1:2], segments[:, 3:4]),
+        ])
+        width = rows[:, _X_MAX] - rows[:, _X_MIN]
+        wide = width > WIDE_SEGMENT_CELLS * self.cell_size
+        
+        narrow_rows = rows[~wide]
+        narrow_rows = narrow_rows[np.argsort(narrow_rows[:, _X_MIN], kind='stable')]
+        position = np.searchsorted(self._table[:self._narrow, _X_MIN], narrow_rows[:, _X_MIN], side='right')
+        self._table = np.vstack([np.insert(self._table, position, narrow_rows, axis=0), rows[wide]])
+        self._narrow += len(narrow_rows)
+        if len(narrow_rows):
+            self._max_width = max(self._max_width, float(width[~wide].max()))
+    
+    def _sweep_curve(self, curve: List[Tuple[float, float]]) -> Iterator[np.ndarray]:
+        """Yield indices of colliding segments of curve, block by block.
+        
+        Blocks follow curve order, so the caller can stop at the first hit.
+        An index may appear in more than one block.
+        """
+        if len(curve) < 2 or len(self._table) == 0:
+            return
+        
+        query = closed_segments(curve)
+        table = self._table
+        q_x_min = np.minimum(query[:, 0], query[:, 2])
+        q_x_max = np.maximum(query[:, 0], query[:, 2])
+        q_y_min = np.minimum(query[:, 1], query[:, 3])
+        q_y_max = np.maximum(query[:, 1], query[:, 3])
+        
+        # Narrow stored segments whose x-range can overlap each query segment
+        narrow = self._narrow
+        num_wide = len(table) - narrow
+        x_min_sorted = table[:narrow, _X_MIN]
+        lo = np.searchsorted(x_min_sorted, q_x_min - self._max_width, side='left')
+        hi = np.searchsorted(x_min_sorted, q_x_max, side='right')
+        narrow_counts = hi - lo
+        # Every query segment is also paired with every wide stored segment
+        counts = narrow_counts + num_wide
+        
+        for q_idx, rank in iter_pair_blocks(counts):
+            # Each query's pairs run over lo..hi-1, then narrow..len-1
+            q_narrow = narrow_counts[q_idx]
+            s_idx = np.where(rank < q_narrow, lo[q_idx] + rank, narrow + rank - q_narrow)
+            
+            # Bounding-box prefilter
+            keep = ((table[s_idx, _X_MIN] <= q_x_max[q_idx])
+                    & (table[s_idx, _X_MAX] >= q_x_min[q_idx])
+                    & (table[s_idx, _Y_MIN] <= q_y_max[q_idx])
+                    & (table[s_idx, _Y_MAX] >= q_y_min[q_idx]))
+            q_idx = q_idx[keep]
+            s_idx = s_idx[keep]
+            
+            crossing = do_lines_intersect_array(query[q_idx], table[s_idx, _X1:_Y2 + 1])
+            yield q_idx[crossing]
+    
+    def _cells(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> Iterator[Tuple[int, int]]:
+        """Yield the grid cells segment (p1, p2) passes through.
+        
+        Each grid column the segment spans gets the rows of the piece of the
+        segment inside it, widened by CELL_MARGIN.
+        """
+        size = self.cell_size
+        (x1, y1), (x2, y2) = sorted([(p1[0] / size, p1[1] / size), (p2[0] / size, p2[1] / size)])
+        for cx in range(math.floor(x1), math.floor(x2) + 1):
+            if x2 == x1:
+                ya, yb = y1, y2
+            else:
+                slope = (y2 - y1) / (x2 - x1)
+                ya = y1 + (max(x1, cx) - x1) * slope
+                yb = y1 + (min(x2, cx + 1) - x1) * slope
+            for cy in range(math.floor(min(ya, yb) - CELL_MARGIN), math.floor(max(ya, yb) + CELL_MARGIN) + 1):
+                yield (cx, cy)
+    
+    def _candidates(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> List[int]:
+        """Return indices of stored segments sharing a grid cell with (p1, p2)."""
+        candidates = set()
+        for cell in self._cells(p1, p2):
+            bucket = self.grid.get(cell)
+            if bucket:
+                candidates.update(bucket)
+        return sorted(candidates)
+    
     def _do_segments_intersect(self, p1: Tuple[float, float], p2: Tuple[float, float], 
                               p3: Tuple[float, float], p4: Tuple[float, float]) -> bool:
         def ccw(A: Tuple[float, float], B: Tuple[float, float], C: Tuple[float, float]) -> bool:
@@ -34,6 +197,8 @@ class IncrementalCollisionDetector:
     
     def clear(self):
         self.segments.clear()
+        self.grid.clear()
+        self._clear_sweep()
 
 
 if __name__ == "__main__":
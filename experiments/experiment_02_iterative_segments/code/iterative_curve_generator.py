@@ -14,13 +14,15 @@ from pathlib import Path
 # Add shared utilities to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'experiment_01_outer_curve', 'code'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from canvas_config import *
-from coordinate_utils import save_coordinates, load_coordinates
+from coordinate_utils import load_coordinates
 from draw_outer_curve import draw_outer_curve
 from segment_creator import create_next_closed_curve
 from PIL import Image, ImageDraw
-import xml.etree.ElementTree as ET
+from atpoe.core.storage import save_curves
+from atpoe.graphics.svg import save_svg
 
 
 def generate_iterative_curves(outer_curve, dist=DEFAULT_DIST, num_curves=5, 
@@ -68,11 +70,6 @@ def generate_iterative_curves(outer_curve, dist=DEFAULT_DIST, num_curves=5,
                 p2 = new_curve[(i + 1) % len(new_curve)]
                 draw.line([p1, p2], fill=color, width=LINE_WIDTH)
             
-            # Save individual curve coordinates
-            output_dir = Path(__file__).parent.parent / 'output'
-            coords_file = output_dir / f'curve_{curve_num + 1}_coordinates.txt'
-            save_coordinates(new_curve, coords_file)
-            
             # Update previous curve for next iteration
             previous_curve = new_curve
             
@@ -90,53 +87,20 @@ def generate_iterative_curves(outer_curve, dist=DEFAULT_DIST, num_curves=5,
         svg_file = output_file.replace('.png', '.svg')
         save_as_svg(curves, canvas_size, svg_file)
         print(f"SVG version saved to: {svg_file}")
+        
+        # Save all curve coordinates in one binary curve file; older runs'
+        # curve_N_coordinates.txt files convert with atpoe.core.storage
+        curves_file = output_file.replace('.png', '.atpc')
+        save_curves(curves_file, curves, {'dist': dist, 'canvas_size': canvas_size})
+        print(f"Curve coordinates saved to: {curves_file}")
     
     return curves
 
 
 def save_as_svg(curves, canvas_size, output_file):
     """Save curves as SVG file for vector examination."""
-    # Create SVG root element
-    svg = ET.Element('svg', {
-        'width': str(canvas_size),
-        'height': str(canvas_size),
-        'xmlns': 'http://www.w3.org/2000/svg',
-        'version': '1.1'
-    })
-    
-    # Add background rectangle
-    background = ET.SubElement(svg, 'rect', {
-        'width': str(canvas_size),
-        'height': str(canvas_size),
-        'fill': 'white'
-    })
-    
-    # Color mapping
-    colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
-    
-    # Add curves as path elements
-    for i, curve in enumerate(curves):
-        if len(curve) < 2:
-            continue
-        
-        color = colors[i % len(colors)]
-        
-        # Create path data
-        path_data = f"M {curve[0][0]} {curve[0][1]}"
-        for point in curve[1:]:
-            path_data += f" L {point[0]} {point[1]}"
-        
-        # Add path element
-        path = ET.SubElement(svg, 'path', {
-            'd': path_data,
-            'stroke': color,
-            'stroke-width': '2',
-            'fill': 'none'
-        })
-    
-    # Write SVG file
-    tree = ET.ElementTree(svg)
-    tree.write(output_file, encoding='utf-8', xml_declaration=True)
+    # Streamed path by path; all points kept, coordinates to 2 decimals
+    save_svg(curves, canvas_size, output_file, colors=CURVE_COLORS, tolerance=0)
 
 
 def main():
@@ -18,7 +18,7 @@ from coordinate_utils import distance
 
 
 def create_next_closed_curve(previous_curve, dist, error=DEFAULT_ERROR, 
-                           segment_length=DEFAULT_SEGMENT_LENGTH):
+                           segment_length=DEFAULT_SEGMENT_LENGTH, rng=None):
     """
     Simple algorithm: Go round inside the previous curve keeping close with 
     approximately constant steps until you get within a step length of the start.
@@ -28,6 +28,8 @@ def create_next_closed_curve(previous_curve, dist, error=DEFAULT_ERROR,
         dist: Target distance from previous curve
         error: Random variation in direction (±error)
         segment_length: Length of each segment
+        rng: random.Random or numpy Generator for the error draws
+             (default: the global random module)
     
     Returns:
         List of (x, y) coordinate points forming closed curve, or None if failed
@@ -35,6 +37,8 @@ def create_next_closed_curve(previous_curve, dist, error=DEFAULT_ERROR,
     if len(previous_curve) < 3:
         return None
     
+    uniform = (random if rng is None else rng).uniform
+    
     # Find center of previous curve
     center_x = sum(x for x, y in previous_curve) / len(previous_curve)
     center_y = sum(y for x, y in previous_curve) / len(previous_curve)
@@ -50,8 +54,8 @@ def create_next_closed_curve(previous_curve, dist, error=DEFAULT_ERROR,
     d = distance(outer_point, (center_x, center_y)) or 1.0
     
     # Add small random error
-    error_x = random.uniform(-error, error)
-    error_y = random.uniform(-error, error)
+    error_x = uniform(-error, error)
+    error_y = uniform(-error, error)
     
     # Place first point at dist distance inside
     first_point = (
@@ -72,8 +76,8 @@ def create_next_closed_curve(previous_curve, dist, error=DEFAULT_ERROR,
         d = distance(outer_point, (center_x, center_y)) or 1.0
         
         # Add small random error
-        error_x = random.uniform(-error, error)
-        error_y = random.uniform(-error, error)
+        error_x = uniform(-error, error)
+        error_y = uniform(-error, error)
         
         target_point = (
             outer_point[0] + (dx / d) * dist + error_x,
@@ -6,9 +6,13 @@ This experiment tests different combinations of:
 - Segment length
 - Error function (≤ 4)
 
-All diagrams are labeled with the parameters used.
+All diagrams are labeled with the parameters used. The parameter sets run
+in parallel through atpoe.sweep, sharing one OUTER_CURVE. With --cache,
+each experiment is seeded with its number and its curves are reused from
+the cache on reruns.
 """
 
+import argparse
 import sys
 import os
 from pathlib import Path
@@ -17,20 +21,25 @@ from pathlib import Path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'experiment_01_outer_curve', 'code'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'experiment_02_iterative_segments', 'code'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from canvas_config import *
 from coordinate_utils import load_coordinates
 from draw_outer_curve import draw_outer_curve
 from segment_creator import create_next_closed_curve
-from PIL import Image, ImageDraw, ImageFont
-import xml.etree.ElementTree as ET
+from PIL import ImageDraw, ImageFont
+from atpoe.core.cache import DEFAULT_CACHE_DIR
+from atpoe.graphics.render import render_curves
+from atpoe.graphics.svg import DEFAULT_TOLERANCE, SVGWriter
+from atpoe.sweep import run_single, run_sweep
 
 
 def create_labeled_image(curves, canvas_size, output_file, params):
     """Create image with parameter labels and antialiasing."""
-    # Create image with antialiasing
-    image = Image.new('RGB', (canvas_size, canvas_size), BACKGROUND_COLOR)
-    draw = ImageDraw.Draw(image, 'RGBA')  # Use RGBA for antialiasing
+    # Draw curves anti-aliased (supersampled), then label at output size
+    image = render_curves(curves, canvas_size, CURVE_COLORS, width=LINE_WIDTH,
+                          background=BACKGROUND_COLOR, antialias=True)
+    draw = ImageDraw.Draw(image)
     
     # Try to use a font, fallback to default if not available
     try:
@@ -38,51 +47,6 @@ def create_labeled_image(curves, canvas_size, output_file, params):
     except:
         font = ImageFont.load_default()
     
-    # Draw curves with antialiasing
-    colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
-    
-    for i, curve in enumerate(curves):
-        if len(curve) < 2:
-            continue
-        
-        color = colors[i % len(colors)]
-        
-        # Convert color to RGBA for antialiasing
-        if color == 'black':
-            rgba_color = (0, 0, 0, 255)
-        elif color == 'blue':
-            rgba_color = (0, 0, 255, 255)
-        elif color == 'red':
-            rgba_color = (255, 0, 0, 255)
-        elif color == 'green':
-            rgba_color = (0, 128, 0, 255)
-        elif color == 'purple':
-            rgba_color = (128, 0, 128, 255)
-        elif color == 'orange':
-            rgba_color = (255, 165, 0, 255)
-        elif color == 'brown':
-            rgba_color = (139, 69, 19, 255)
-        elif color == 'pink':
-            rgba_color = (255, 192, 203, 255)
-        else:
-            rgba_color = (0, 0, 0, 255)
-        
-        # Draw the curve with antialiasing
-        for j in range(len(curve)):
-            p1 = curve[j]
-            p2 = curve[(j + 1) % len(curve)]
-            # Draw multiple thin lines for antialiasing effect
-            for offset in range(-1, 2):
-                for offset2 in range(-1, 2):
-                    if offset == 0 and offset2 == 0:
-                        # Main line
-                        draw.line([p1, p2], fill=rgba_color, width=LINE_WIDTH)
-                    else:
-                        # Subtle offset lines for antialiasing
-                        p1_offset = (p1[0] + offset, p1[1] + offset2)
-                        p2_offset = (p2[0] + offset, p2[1] + offset2)
-                        draw.line([p1_offset, p2_offset], fill=(rgba_color[0], rgba_color[1], rgba_color[2], 50), width=1)
-    
     # Add parameter labels
     label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']}"
     draw.text((10, 10), label_text, fill='black', font=font)
@@ -97,211 +61,78 @@ def create_labeled_image(curves, canvas_size, output_file, params):
 
 
 def create_labeled_svg(curves, canvas_size, output_file, params):
-    """Create SVG with parameter labels."""
-    # Check total points to estimate file size
-    total_points = sum(len(curve) for curve in curves)
-    estimated_size_mb = total_points * 0.01  # Rough estimate: ~10KB per 1000 points
+    """Create SVG with parameter labels.
     
-    if estimated_size_mb > 2:  # Lower limit for 5 curves
-        print(f"WARNING: Estimated SVG size would be ~{estimated_size_mb:.1f}MB (>2MB limit)")
-        print(f"Creating simplified SVG with reduced points...")
-        
-        # Create simplified SVG with fewer points
-        svg = ET.Element('svg', {
-            'width': str(canvas_size),
-            'height': str(canvas_size),
-            'xmlns': 'http://www.w3.org/2000/svg',
-            'version': '1.1'
-        })
-        
-        # Add background rectangle
-        background = ET.SubElement(svg, 'rect', {
-            'width': str(canvas_size),
-            'height': str(canvas_size),
-            'fill': 'white'
-        })
-        
-        # Color mapping
-        colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
-        
-        # Add curves as simplified path elements (every 10th point)
-        for i, curve in enumerate(curves):
-            if len(curve) < 2:
-                continue
-            
-            color = colors[i % len(colors)]
-            
-            # Sample every 10th point to reduce file size
-            sampled_curve = curve[::10]
-            if len(sampled_curve) < 2:
-                sampled_curve = curve[::5]  # If still too few, sample every 5th
-            if len(sampled_curve) < 2:
-                sampled_curve = curve  # Use all points if necessary
-            
-            # Create path data
-            path_data = f"M {sampled_curve[0][0]:.1f} {sampled_curve[0][1]:.1f}"
-            for point in sampled_curve[1:]:
-                path_data += f" L {point[0]:.1f} {point[1]:.1f}"
-            
-            # Add path element
-            path = ET.SubElement(svg, 'path', {
-                'd': path_data,
-                'stroke': color,
-                'stroke-width': '2',
-                'fill': 'none'
-            })
+    Curves are simplified to within 0.25px (Ramer-Douglas-Peucker) and
+    written with relative 2-decimal coordinates, which keeps the file well
+    under the 2MB limit without visible change.
+    """
+    with SVGWriter(output_file, canvas_size, tolerance=DEFAULT_TOLERANCE) as svg:
+        svg.write_curves(curves, CURVE_COLORS, stroke_width=LINE_WIDTH)
         
         # Add parameter labels as text elements
-        label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']} (Simplified)"
-        text = ET.SubElement(svg, 'text', {
-            'x': '10',
-            'y': '25',
-            'font-family': 'Arial',
-            'font-size': '16',
-            'fill': 'black'
-        })
-        text.text = label_text
-        
-        curve_count_text = f"Curves: {len(curves)} (Simplified)"
-        text2 = ET.SubElement(svg, 'text', {
-            'x': '10',
-            'y': '45',
-            'font-family': 'Arial',
-            'font-size': '16',
-            'fill': 'black'
-        })
-        text2.text = curve_count_text
-        
-        # Write SVG file
-        tree = ET.ElementTree(svg)
-        tree.write(output_file, encoding='utf-8', xml_declaration=True)
-        print(f"Simplified SVG saved to: {output_file}")
-        return True
-    
-    # Create full SVG for smaller files
-    svg = ET.Element('svg', {
-        'width': str(canvas_size),
-        'height': str(canvas_size),
-        'xmlns': 'http://www.w3.org/2000/svg',
-        'version': '1.1'
-    })
+        label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']}"
+        svg.write_text(10, 25, label_text)
+        svg.write_text(10, 45, f"Curves: {len(curves)}")
     
-    # Add background rectangle
-    background = ET.SubElement(svg, 'rect', {
-        'width': str(canvas_size),
-        'height': str(canvas_size),
-        'fill': 'white'
-    })
-    
-    # Color mapping
-    colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
-    
-    # Add curves as path elements
-    for i, curve in enumerate(curves):
-        if len(curve) < 2:
-            continue
-        
-        color = colors[i % len(colors)]
-        
-        # Create path data
-        path_data = f"M {curve[0][0]} {curve[0][1]}"
-        for point in curve[1:]:
-            path_data += f" L {point[0]} {point[1]}"
-        
-        # Add path element
-        path = ET.SubElement(svg, 'path', {
-            'd': path_data,
-            'stroke': color,
-            'stroke-width': '2',
-            'fill': 'none'
-        })
-    
-    # Add parameter labels as text elements
-    label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']}"
-    text = ET.SubElement(svg, 'text', {
-        'x': '10',
-        'y': '25',
-        'font-family': 'Arial',
-        'font-size': '16',
-        'fill': 'black'
-    })
-    text.text = label_text
-    
-    curve_count_text = f"Curves: {len(curves)}"
-    text2 = ET.SubElement(svg, 'text', {
-        'x': '10',
-        'y': '45',
-        'font-family': 'Arial',
-        'font-size': '16',
-        'fill': 'black'
-    })
-    text2.text = curve_count_text
-    
-    # Write SVG file
-    tree = ET.ElementTree(svg)
-    tree.write(output_file, encoding='utf-8', xml_declaration=True)
     print(f"Labeled SVG saved to: {output_file}")
     return True
 
 
-def run_parameter_experiment(experiment_num, dist, segment_length, error, num_curves=10):
-    """Run a single parameter experiment."""
-    print(f"\n=== Experiment {experiment_num} ===")
-    print(f"Distance: {dist}px, Segment: {segment_length}px, Error: {error}")
-    
-    # Load or create OUTER_CURVE
+def load_outer_curve():
+    """Load the OUTER_CURVE from Experiment 01, or create it."""
     outer_curve_file = Path(__file__).parent.parent.parent / 'experiment_01_outer_curve' / 'output' / 'outer_curve_coordinates.txt'
     if outer_curve_file.exists():
         print("Loading existing OUTER_CURVE...")
-        outer_curve = load_coordinates(outer_curve_file)
-    else:
-        print("Creating OUTER_CURVE...")
-        outer_curve = draw_outer_curve()
-    
-    # Generate curves
-    curves = [outer_curve]
-    previous_curve = outer_curve
-    
-    for curve_num in range(1, num_curves + 1):
-        print(f"Generating curve {curve_num + 1}...")
-        
-        new_curve = create_next_closed_curve(previous_curve, dist, error, segment_length)
-        
-        if new_curve:
-            curves.append(new_curve)
-            previous_curve = new_curve
-            print(f"  Generated curve {curve_num + 1} with {len(new_curve)} points")
-        else:
-            print(f"  Failed to generate curve {curve_num + 1}")
-            break
-    
-    # Create output files
-    output_dir = Path(__file__).parent.parent / 'output'
-    output_dir.mkdir(exist_ok=True)
-    
-    params = {
-        'dist': dist,
-        'segment_length': segment_length,
-        'error': error
-    }
-    
-    # Save labeled images
+        return load_coordinates(outer_curve_file)
+    print("Creating OUTER_CURVE...")
+    return draw_outer_curve()
+
+
+def render_labeled(curves, canvas_size, output_dir, experiment_num, params):
+    """Save the labeled PNG and SVG of one experiment; return the file names."""
+    dist, segment_length, error = params['dist'], params['segment_length'], params['error']
     png_file = output_dir / f'experiment_{experiment_num}_dist{dist}_seg{segment_length}_err{error}.png'
     svg_file = output_dir / f'experiment_{experiment_num}_dist{dist}_seg{segment_length}_err{error}.svg'
     
-    create_labeled_image(curves, 1200, str(png_file), params)
-    svg_created = create_labeled_svg(curves, 1200, str(svg_file), params)
+    create_labeled_image(curves, canvas_size, str(png_file), params)
+    svg_created = create_labeled_svg(curves, canvas_size, str(svg_file), params)
     
     if not svg_created:
         # Remove the SVG file if it was created but too large
         if svg_file.exists():
             svg_file.unlink()
+        return [png_file.name]
+    
+    return [png_file.name, svg_file.name]
+
+
+def run_parameter_experiment(experiment_num, dist, segment_length, error, num_curves=10, seed=None):
+    """Run a single parameter experiment and return its manifest entry."""
+    print(f"\n=== Experiment {experiment_num} ===")
+    print(f"Distance: {dist}px, Segment: {segment_length}px, Error: {error}")
     
-    return curves
+    params = {
+        'dist': dist,
+        'segment_length': segment_length,
+        'error': error,
+        'num_curves': num_curves,
+        'seed': seed
+    }
+    return run_single(
+        experiment_num, params, load_outer_curve(), Path(__file__).parent.parent / 'output',
+        canvas_size=1200, nested_curve=create_next_closed_curve, render=render_labeled
+    )
 
 
-def main():
+def main(argv=None):
     """Run all parameter experiments."""
+    parser = argparse.ArgumentParser(description="Experiment 03: Parameter Variation")
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_DIR), metavar='DIR',
+                        help=f'Seed each experiment with its number and reuse its curves from a cache '
+                             f'(default directory: {DEFAULT_CACHE_DIR})')
+    args = parser.parse_args(argv)
+    
     print("Starting Parameter Variation Experiments")
     print("=======================================")
     
@@ -323,29 +154,24 @@ def main():
         {'dist': 10, 'segment_length': 2, 'error': 2.0}
     ]
     
-    all_results = []
+    # Reduced to 5 curves for smaller SVG files; seed None draws a fresh
+    # random.Random per experiment, as the serial runs did. Cached runs are
+    # seeded with the experiment number, so reruns reuse the cached curves.
+    grid = [dict(params, num_curves=5, seed=i if args.cache else None)
+            for i, params in enumerate(experiments, 1)]
     
-    for i, params in enumerate(experiments, 1):
-        curves = run_parameter_experiment(
-            experiment_num=i,
-            dist=params['dist'],
-            segment_length=params['segment_length'],
-            error=params['error'],
-            num_curves=5  # Reduced to 5 curves for smaller SVG files
-        )
-        all_results.append({
-            'experiment': i,
-            'params': params,
-            'curves': len(curves),
-            'total_points': sum(len(curve) for curve in curves)
-        })
+    all_results = run_sweep(
+        grid, load_outer_curve(), Path(__file__).parent.parent / 'output',
+        canvas_size=1200, nested_curve=create_next_closed_curve,
+        render=render_labeled, cache_dir=args.cache
+    )
     
     # Print summary
     print("\n" + "="*50)
     print("EXPERIMENT SUMMARY")
     print("="*50)
     for result in all_results:
-        print(f"Experiment {result['experiment']}: "
+        print(f"Experiment {result['index']}: "
               f"Distance={result['params']['dist']}px, "
               f"Segment={result['params']['segment_length']}px, "
               f"Error={result['params']['error']} → "
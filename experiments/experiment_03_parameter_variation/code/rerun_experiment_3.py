@@ -2,44 +2,37 @@
 """
 Rerun Experiment 3 with 30 and 40 curves
 Original parameters: Distance=8px, Segment=4px, Error=3.0
+
+The 40-curve run continues from the curves of the 30-curve run, read back
+from its saved curve file. With --cache, the runs are seeded and cached,
+and the 40-curve run reads them back from the cache instead.
 """
 
+import argparse
 import sys
 import os
 
 # Add shared utilities to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'experiment_02_iterative_segments', 'code'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from canvas_config import *
-from coordinate_utils import distance
+from coordinate_utils import load_coordinates
 from segment_creator import create_next_closed_curve
-from PIL import Image, ImageDraw
-import xml.etree.ElementTree as ET
+from PIL import ImageDraw
 import random
+from atpoe.core.cache import DEFAULT_CACHE_DIR, CurveCache, resume_curves, run_params
+from atpoe.graphics.render import render_curves
+from atpoe.core.storage import CurveFile, load_curves, save_curves
+from atpoe.graphics.svg import DEFAULT_TOLERANCE, SVGWriter
 
 def create_labeled_image(curves, canvas_size, output_file, params, num_curves):
     """Create PNG with parameter labels and antialiasing."""
-    # Create image with white background
-    image = Image.new('RGB', (canvas_size, canvas_size), BACKGROUND_COLOR)
-    draw = ImageDraw.Draw(image, 'RGBA')  # Use RGBA for transparency
-    
-    # Color mapping
-    colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
-    
-    # Draw curves with antialiasing
-    for i, curve in enumerate(curves):
-        if len(curve) < 2:
-            continue
-        
-        color = colors[i % len(colors)]
-        
-        # Draw multiple thin lines with slight offsets for antialiasing
-        for offset in range(-1, 2):
-            for offset2 in range(-1, 2):
-                alpha = 100 if offset == 0 and offset2 == 0 else 30
-                points = [(p[0] + offset, p[1] + offset2) for p in curve]
-                draw.line(points, fill=color, width=1)
+    # Draw curves anti-aliased (supersampled) on a white background
+    image = render_curves(curves, canvas_size, CURVE_COLORS, width=LINE_WIDTH,
+                          background=BACKGROUND_COLOR, antialias=True)
+    draw = ImageDraw.Draw(image)
     
     # Add parameter labels
     label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']}"
@@ -57,80 +50,58 @@ def create_labeled_image(curves, canvas_size, output_file, params, num_curves):
     print(f"Labeled image saved to: {output_file}")
 
 def create_labeled_svg(curves, canvas_size, output_file, params, num_curves):
-    """Create SVG with parameter labels - using ALL points (no sampling)."""
-    # Check total points to estimate file size
+    """Create SVG with parameter labels.
+    
+    Curves are simplified to within 0.25px (Ramer-Douglas-Peucker) and
+    streamed path by path with relative coordinates formatted to 2 decimals.
+    """
     total_points = sum(len(curve) for curve in curves)
-    estimated_size_mb = total_points * 0.01  # Rough estimate: ~10KB per 1000 points
-    
-    print(f"Creating SVG with ALL {total_points} points (estimated size: ~{estimated_size_mb:.1f}MB)")
-    
-    # Create SVG with ALL points (no sampling)
-    svg = ET.Element('svg', {
-        'width': str(canvas_size),
-        'height': str(canvas_size),
-        'xmlns': 'http://www.w3.org/2000/svg',
-        'version': '1.1'
-    })
-    
-    # Add background rectangle
-    background = ET.SubElement(svg, 'rect', {
-        'width': str(canvas_size),
-        'height': str(canvas_size),
-        'fill': 'white'
-    })
-    
-    # Color mapping
-    colors = ['black', 'blue', 'red', 'green', 'purple', 'orange', 'brown', 'pink']
-    
-    # Add curves as path elements with ALL points
-    for i, curve in enumerate(curves):
-        if len(curve) < 2:
-            continue
-        
-        color = colors[i % len(colors)]
-        
-        # Create path data with ALL points (no sampling) - formatted to 2 decimals
-        path_data = f"M {curve[0][0]:.2f} {curve[0][1]:.2f}"
-        for point in curve[1:]:
-            path_data += f" L {point[0]:.2f} {point[1]:.2f}"
+    print(f"Creating SVG from {total_points} points")
+    
+    with SVGWriter(output_file, canvas_size, tolerance=DEFAULT_TOLERANCE) as svg:
+        svg.write_curves(curves, CURVE_COLORS, stroke_width=LINE_WIDTH)
         
-        # Add path element
-        path = ET.SubElement(svg, 'path', {
-            'd': path_data,
-            'stroke': color,
-            'stroke-width': '2',
-            'fill': 'none'
-        })
-    
-    # Add parameter labels as text elements
-    label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']}"
-    text = ET.SubElement(svg, 'text', {
-        'x': '10',
-        'y': '25',
-        'font-family': 'Arial',
-        'font-size': '16',
-        'fill': 'black'
-    })
-    text.text = label_text
-    
-    curve_count_text = f"Curves: {num_curves} (All Points)"
-    text2 = ET.SubElement(svg, 'text', {
-        'x': '10',
-        'y': '45',
-        'font-family': 'Arial',
-        'font-size': '16',
-        'fill': 'black'
-    })
-    text2.text = curve_count_text
-    
-    # Write SVG file
-    tree = ET.ElementTree(svg)
-    tree.write(output_file, encoding='utf-8', xml_declaration=True)
-    print(f"Full SVG with all points saved to: {output_file}")
+        # Add parameter labels as text elements
+        label_text = f"Distance: {params['dist']}px, Segment: {params['segment_length']}px, Error: {params['error']}"
+        svg.write_text(10, 25, label_text)
+        svg.write_text(10, 45, f"Curves: {num_curves}")
+    
+    print(f"SVG saved to: {output_file}")
     return True
 
-def run_experiment_3_with_curves(num_curves):
-    """Run experiment 3 with specified number of curves."""
+def curves_file(num_curves):
+    """Path of the binary curve file saved by the run with ``num_curves`` curves."""
+    output_dir = os.path.join(os.path.dirname(__file__), '..', 'output')
+    return os.path.join(output_dir, f'experiment_3_dist8_seg4_err3.0_{num_curves}curves.atpc')
+
+def load_saved_curves(path, params):
+    """Return the curves saved in ``path`` by a run with ``params``, or None."""
+    if not os.path.exists(path):
+        return None
+    saved = CurveFile(path).params
+    if any(saved.get(key) != params[key] for key in ('dist', 'segment_length', 'error')):
+        return None
+    return [list(map(tuple, curve.tolist())) for curve in load_curves(path)]
+
+def nested_curves(start_curves, num_curves, next_curve, rng=None):
+    """Yield the start curves, then nested curves inside the last, num_curves in all."""
+    yield from start_curves[:num_curves]
+    curve = start_curves[-1]
+    for _ in range(num_curves - len(start_curves)):
+        curve = next_curve(curve, rng)
+        if not curve:
+            return
+        yield curve
+
+def run_experiment_3_with_curves(num_curves, seed=None, cache=None, resume_from=None):
+    """Run experiment 3 with specified number of curves.
+    
+    With ``cache`` and a ``seed``, every curve is checkpointed in the cache
+    together with the RNG state, so a longer run continues from the curves
+    of a shorter one instead of regenerating them. Otherwise, with
+    ``resume_from``, the run continues from the curves saved in that curve
+    file by an earlier run with the same parameters.
+    """
     print(f"\n=== Experiment 3 with {num_curves} curves ===")
     print("Distance: 8px, Segment: 4px, Error: 3.0")
     
@@ -138,13 +109,7 @@ def run_experiment_3_with_curves(num_curves):
     outer_curve_file = os.path.join(os.path.dirname(__file__), '..', '..', 'experiment_01_outer_curve', 'output', 'outer_curve_coordinates.txt')
     if os.path.exists(outer_curve_file):
         print("Loading existing OUTER_CURVE...")
-        with open(outer_curve_file, 'r') as f:
-            lines = f.readlines()
-            outer_curve = []
-            for line in lines:
-                if line.strip():
-                    x, y = map(float, line.strip().split(','))
-                    outer_curve.append((x, y))
+        outer_curve = load_coordinates(outer_curve_file)
     else:
         print("ERROR: OUTER_CURVE not found!")
         return None
@@ -153,28 +118,38 @@ def run_experiment_3_with_curves(num_curves):
     params = {
         'dist': 8,
         'segment_length': 4,
-        'error': 3.0
+        'error': 3.0,
+        'seed': seed
     }
     
-    curves = [outer_curve]
-    
-    # Generate nested curves
-    for curve_num in range(2, num_curves + 1):
-        print(f"Generating curve {curve_num}...")
-        
-        new_curve = create_next_closed_curve(
-            curves[-1],
+    def next_curve(curve, rng):
+        return create_next_closed_curve(
+            curve,
             dist=params['dist'],
             error=params['error'],
-            segment_length=params['segment_length']
+            segment_length=params['segment_length'],
+            rng=rng
         )
-        
-        if new_curve:
-            curves.append(new_curve)
-            print(f"  Generated curve {curve_num} with {len(new_curve)} points")
-        else:
-            print(f"  Failed to generate curve {curve_num}")
-            break
+    
+    # Generate nested curves, reading back those of earlier cached runs
+    rng = random.Random(seed) if seed is not None else None
+    if cache is not None and seed is not None:
+        run = run_params(create_next_closed_curve, CANVAS_SIZE, None, params['segment_length'],
+                         params['dist'], params['error'], seed, outer_curve)
+        generated = resume_curves(cache, run, num_curves, lambda: outer_curve, next_curve, rng)
+    else:
+        saved = load_saved_curves(resume_from, params) if resume_from else None
+        if saved:
+            print(f"Continuing from the {len(saved)} curves in {resume_from}")
+        generated = nested_curves(saved or [outer_curve], num_curves, next_curve, rng)
+    
+    curves = []
+    for curve_num, curve in enumerate(generated, 1):
+        curves.append(curve)
+        if curve_num > 1:
+            print(f"  Curve {curve_num} with {len(curve)} points")
+    if len(curves) < num_curves:
+        print(f"  Failed to generate curve {len(curves) + 1}")
     
     # Create output directory
     output_dir = os.path.join(os.path.dirname(__file__), '..', 'output')
@@ -188,22 +163,37 @@ def run_experiment_3_with_curves(num_curves):
     svg_file = os.path.join(output_dir, f'experiment_3_dist8_seg4_err3.0_{num_curves}curves.svg')
     create_labeled_svg(curves, CANVAS_SIZE, svg_file, params, num_curves)
     
+    # Save all curves with the run parameters in one binary curve file
+    saved_file = curves_file(num_curves)
+    save_curves(saved_file, curves, dict(params, num_curves=num_curves))
+    print(f"Curves saved to: {saved_file}")
+    
     # Print summary
     total_points = sum(len(curve) for curve in curves)
     print(f"Generated {len(curves)} curves with {total_points} total points")
     
     return curves
 
-def main():
+def main(argv=None):
     """Main function to run both experiments."""
+    parser = argparse.ArgumentParser(description="Rerun Experiment 3 with 30 and 40 curves")
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_DIR), metavar='DIR',
+                        help=f'Seed the runs and reuse their curves from a cache '
+                             f'(default directory: {DEFAULT_CACHE_DIR})')
+    args = parser.parse_args(argv)
+    
     print("Rerunning Experiment 3 with 30 and 40 curves")
     print("=============================================")
     
+    cache = CurveCache(args.cache) if args.cache else None
+    seed = 3 if cache is not None else None
+    
     # Run with 30 curves
-    curves_30 = run_experiment_3_with_curves(30)
+    curves_30 = run_experiment_3_with_curves(30, seed=seed, cache=cache)
     
-    # Run with 40 curves
-    curves_40 = run_experiment_3_with_curves(40)
+    # Run with 40 curves, continuing from the 30 curves above (read back from
+    # the cache, or else from their saved curve file)
+    curves_40 = run_experiment_3_with_curves(40, seed=seed, cache=cache, resume_from=curves_file(30))
     
     print("\n==================================================")
     print("EXPERIMENT SUMMARY")
@@ -13,6 +13,7 @@ import json
 # Import our systems
 from graphics_bundle import BundleLibrary, BundleSelector, GraphicsBundle
 from collision_detector import IncrementalCollisionDetector
+from atpoe.graphics.render import draw_closed_curves
 
 # Import step5 functions
 sys.path.append('experiments/step5_correct_approach')
@@ -26,7 +27,9 @@ class InteractiveCurveDrawer:
         self.canvas_size = canvas_size
         self.bundle_library = BundleLibrary()
         self.bundle_selector = BundleSelector(self.bundle_library)
-        self.collision_detector = IncrementalCollisionDetector()
+        self.segment_length = 15  # Fixed for now
+        # Grid cells sized to the drawn segments
+        self.collision_detector = IncrementalCollisionDetector(self.segment_length)
         self.all_curves = []
         self.current_image = None
         self.output_dir = "interactive_output"
@@ -92,7 +95,7 @@ class InteractiveCurveDrawer:
         print(f"\nDrawing {num_curves} curves with bundle '{bundle.name}' and error {error}")
         
         curves_batch = []
-        segment_length = 15  # Fixed for now
+        segment_length = self.segment_length
         
         for i in range(num_curves):
             if self.curve_count == 0:
@@ -102,10 +105,11 @@ class InteractiveCurveDrawer:
                 # Generate nested curve
                 curve = generate_nested_curve(self.all_curves[-1], segment_length, 15, error)
             
-            # Check for collisions
-            if self.collision_detector.add_curve(curve):
+            # Check the whole curve against earlier curves in one batch query
+            if self.collision_detector.check_curve(curve) is not None:
                 print(f"Collision detected at curve {self.curve_count + 1}, stopping batch")
                 break
+            self.collision_detector.add_segments(curve)
             
             curves_batch.append(curve)
             self.all_curves.append(curve)
@@ -122,19 +126,9 @@ class InteractiveCurveDrawer:
         
         draw = ImageDraw.Draw(self.current_image)
         
-        for curve in curves:
-            # Draw curve segments
-            for i in range(len(curve)):
-                p1 = curve[i]
-                p2 = curve[(i + 1) % len(curve)]
-                
-                # Apply graphics bundle
-                if bundle.dash_pattern:
-                    # For now, use solid lines (PIL doesn't support dashed lines directly)
-                    draw.line([p1, p2], fill=bundle.color, width=int(bundle.width))
-                else:
-                    # Solid line
-                    draw.line([p1, p2], fill=bundle.color, width=int(bundle.width))
+        # Apply graphics bundle; dash patterns are drawn solid for now
+        # (PIL doesn't support dashed lines directly)
+        draw_closed_curves(draw, curves, [bundle.color], width=int(bundle.width))
     
     def save_current_image(self, batch_name: str = None):
         """Save the current canvas to a file."""
@@ -235,6 +229,7 @@ class InteractiveCurveDrawer:
                 confirm = input("Start new canvas? This will clear the current drawing. (y/N): ").strip().lower()
                 if confirm == 'y':
                     self.initialize_canvas()
+                    self.collision_detector.clear()
                     self.all_curves = []
                     self.curve_count = 0
                     self.batch_count = 0
@@ -44,11 +44,12 @@ def generate_base_polygon(n_points, radius):
         for i in range(n_points)
     ]
 
-def perturb_polygon(points, inward=1.0, error_scale=0.5):
+def perturb_polygon(points, inward=1.0, error_scale=0.5, rng=None):
     """
     Return a new polygon that perturbs each point inward with added noise.
     Simulates 'hand-drawn' variation in repeated tracing.
     """
+    uniform = (random if rng is None else rng).uniform
     new_points = []
     for x, y in points:
         # Move slightly inward toward origin
@@ -56,8 +57,8 @@ def perturb_polygon(points, inward=1.0, error_scale=0.5):
         length = math.hypot(dx, dy) or 1
         nx, ny = dx / length, dy / length
         # Add error
-        jitter_x = random.uniform(-1, 1) * error_scale
-        jitter_y = random.uniform(-1, 1) * error_scale
+        jitter_x = uniform(-1, 1) * error_scale
+        jitter_y = uniform(-1, 1) * error_scale
         new_x = x + nx * inward + jitter_x
         new_y = y + ny * inward + jitter_y
         new_points.append((new_x, new_y))
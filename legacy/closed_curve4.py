@@ -34,11 +34,12 @@ def generate_circle_polygon(n_points, radius):
         for i in range(n_points)
     ]
 
-def perturb_polygon(points, margin, error_scale):
+def perturb_polygon(points, margin, error_scale, rng=None):
     """
     Perturb each point inward by at least margin + random error.
     Ensures no point crosses or touches the previous polygon boundary.
     """
+    uniform = (random if rng is None else rng).uniform
     new_points = []
     for x, y in points:
         dx, dy = -x, -y  # inward vector toward origin
@@ -46,7 +47,7 @@ def perturb_polygon(points, margin, error_scale):
         nx, ny = dx / dist, dy / dist
 
         # Push inward by margin plus some random error between 0 and error_scale
-        jitter = random.uniform(0, error_scale)
+        jitter = uniform(0, error_scale)
         total_push = margin + jitter
 
         new_x = x + nx * total_push
@@ -77,13 +77,14 @@ def resample_polygon(points, n_new):
         current_dist += spacing
     return new_points
 
-def perturb_polygon(points, margin, error_scale):
+def perturb_polygon(points, margin, error_scale, rng=None):
+    uniform = (random if rng is None else rng).uniform
     new_points = []
     for x, y in points:
         dx, dy = -x, -y  # inward vector
         dist = math.hypot(dx, dy) or 1.0
         nx, ny = dx / dist, dy / dist
-        jitter = random.uniform(0, error_scale)
+        jitter = uniform(0, error_scale)
         total_push = margin + jitter
         new_x = x + nx * total_push
         new_y = y + ny * total_push
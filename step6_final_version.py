@@ -12,6 +12,8 @@ import math
 import random
 from PIL import Image, ImageDraw
 
+from atpoe.core.nearest import NearestPointIndex
+
 def generate_initial_circle(canvas_size, radius, segment_length=3):
     """Generate initial circle centered at canvas center with fixed segment length."""
     center_x = canvas_size // 2
@@ -48,11 +50,16 @@ def generate_initial_circle(canvas_size, radius, segment_length=3):
     
     return points
 
-def generate_nested_curve(outer_curve, length, error, segment_length=3):
-    """Generate a nested curve inside the outer curve with fixed segment length."""
+def generate_nested_curve(outer_curve, length, error, segment_length=3, rng=None):
+    """Generate a nested curve inside the outer curve with fixed segment length.
+    
+    Pass a seeded ``rng`` (random.Random or numpy Generator) for reproducible runs.
+    """
     if len(outer_curve) < 3:
         return None
     
+    uniform = (random if rng is None else rng).uniform
+    
     # Calculate center of outer curve
     center_x = sum(x for x, y in outer_curve) / len(outer_curve)
     center_y = sum(y for x, y in outer_curve) / len(outer_curve)
@@ -82,23 +89,19 @@ def generate_nested_curve(outer_curve, length, error, segment_length=3):
     dy = dy / dist * length
     
     # Add error
-    error_x = random.uniform(-error, error)
-    error_y = random.uniform(-error, error)
+    error_x = uniform(-error, error)
+    error_y = uniform(-error, error)
     
     start_point = (ox + dx + error_x, oy + dy + error_y)
     current_point = start_point
     new_curve.append(current_point)
     
+    # Prebuilt nearest-vertex index over the outer curve
+    outer_index = NearestPointIndex(outer_curve, cell_size=max(length, segment_length))
+    
     while True:
         # Find closest point on outer curve to current point
-        min_dist = float('inf')
-        closest_outer_point = None
-        
-        for ox, oy in outer_curve:
-            dist = math.hypot(current_point[0] - ox, current_point[1] - oy)
-            if dist < min_dist:
-                min_dist = dist
-                closest_outer_point = (ox, oy)
+        closest_outer_point = outer_index.nearest(current_point)
         
         if not closest_outer_point:
             break
@@ -114,8 +117,8 @@ def generate_nested_curve(outer_curve, length, error, segment_length=3):
         dy = dy / dist * length
         
         # Add error
-        error_x = random.uniform(-error, error)
-        error_y = random.uniform(-error, error)
+        error_x = uniform(-error, error)
+        error_y = uniform(-error, error)
         
         # Calculate new point at segment_length distance from current point
         # in the direction of (dx, dy)
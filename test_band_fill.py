@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Band fill check: bands filled in one pass with fill_bands end where
+Pillow's polygon fill of each curve would, so with the curves drawn over
+them the image equals one filled with a polygon per curve, and a tiled
+render equals the whole canvas
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+try:
+    import numpy as np
+    from PIL import Image
+    from atpoe.core.curve_generator import iter_nested_curves
+    from atpoe.graphics.render import CurveCanvas, render_curves
+    from atpoe.graphics.tiled import render_tiled
+
+    colors = ['black', 'blue', 'red']
+    fill_colors = ['lightgray', 'lightblue', 'wheat']
+
+    for seed in (1, 2):
+        curves = list(iter_nested_curves(60, 6, 1.5, 3, rng=random.Random(seed)))
+
+        # One polygon fill per curve, outermost first, then the curves
+        reference = CurveCanvas(1000)
+        for k, curve in enumerate(curves):
+            reference.fill_curve(curve, fill_colors[k % len(fill_colors)])
+        reference.draw_curves(curves, colors, width=2)
+
+        canvas = CurveCanvas(1000)
+        canvas.fill_bands(curves, fill_colors)
+        canvas.draw_curves(curves, colors, width=2)
+
+        expected = np.asarray(reference.image())
+        filled = np.asarray(canvas.image())
+        differ = int(np.any(expected != filled, axis=2).sum())
+        assert differ == 0, f"seed {seed}: {differ} pixels differ from polygon fills"
+
+        # Tiles whose edges cut through curves and bands
+        for antialias in (False, True):
+            whole = np.asarray(render_curves(curves, 1000, colors, antialias=antialias,
+                                             fill_colors=fill_colors))
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'tiled.png')
+                render_tiled(curves, 1000, path, colors, antialias=antialias,
+                             fill_colors=fill_colors, tile_size=300)
+                tiled = np.asarray(Image.open(path).convert('RGB'))
+            assert np.array_equal(whole, tiled), f"seed {seed}: tiled render differs (antialias={antialias})"
+
+    print("✅ Bands match polygon fills and tiled renders match the whole canvas")
+except Exception as e:
+    print(f"❌ Band fill check failed: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
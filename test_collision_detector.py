@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Collision detector check: the grid lookup in check_collision finds exactly
+the stored segments that testing every one with do_lines_intersect finds,
+including long diagonal chords and segments along grid lines, and the
+batch queries check_curve and count_collisions agree with check_collision
+on every segment of a curve
+"""
+
+import math
+import random
+import sys
+
+try:
+    from atpoe.core.curve_generator import do_lines_intersect
+    from collision_detector import IncrementalCollisionDetector
+
+    def brute_force_collision(segments, p1, p2):
+        """Test the query segment against every stored segment."""
+        return any(do_lines_intersect(p1, p2, q1, q2) for q1, q2 in segments)
+
+    def closed_pairs(curve):
+        return [(curve[i], curve[(i + 1) % len(curve)]) for i in range(len(curve))]
+
+    def rough_arc(rng, radius, points, noise, fraction=1.0):
+        """Points along a noisy circle, or the first ``fraction`` of it."""
+        return [(500 + (radius + rng.uniform(-noise, noise)) * math.cos(2 * math.pi * j / points),
+                 500 + (radius + rng.uniform(-noise, noise)) * math.sin(2 * math.pi * j / points))
+                for j in range(int(points * fraction))]
+
+    rng = random.Random(11)
+    cell_size = 3
+    checked = 0
+    batches = 0
+    for trial in range(20):
+        detector = IncrementalCollisionDetector(cell_size)
+        # Open arcs, closed by a long chord across the canvas like a drawn stroke
+        for _ in range(3):
+            detector.add_segments(rough_arc(rng, rng.uniform(100, 400), rng.randint(50, 500),
+                                            rng.uniform(0, 10), rng.uniform(0.3, 1.0)))
+        # Segments on grid lines and through grid corners
+        detector.add_segments([(0.0, 300.0), (900.0, 300.0), (900.0, 303.0)])
+        detector.add_segments([(600.0, 0.0), (600.0, 900.0), (603.0, 900.0)])
+        detector.add_segments([(0.0, 0.0), (999.0, 999.0), (999.0, 996.0)])
+
+        curve = rough_arc(rng, rng.uniform(100, 400), rng.randint(50, 500), rng.uniform(0, 10))
+        hits = [detector.check_collision(p1, p2) for p1, p2 in closed_pairs(curve)]
+        first_hit = hits.index(True) if any(hits) else None
+        assert detector.check_curve(curve) == first_hit, \
+            f"trial {trial}: check_curve gave {detector.check_curve(curve)}, expected {first_hit}"
+        assert detector.count_collisions(curve) == sum(hits), \
+            f"trial {trial}: count_collisions gave {detector.count_collisions(curve)}, expected {sum(hits)}"
+        batches += 1
+
+        query = closed_pairs(curve)
+        query += [((300.0, 0.0), (300.0, 900.0)), ((0.0, 600.0), (900.0, 600.0)),
+                  ((0.0, 999.0), (999.0, 0.0))]
+        for p1, p2 in query:
+            expected = brute_force_collision(detector.segments, p1, p2)
+            assert detector.check_collision(p1, p2) == expected, \
+                f"trial {trial}: grid and pair scan disagree on {p1}-{p2}"
+            checked += 1
+
+    # A long diagonal chord only fills the cells along it
+    detector = IncrementalCollisionDetector(cell_size)
+    detector.add_segments([(100, 100), (1000, 1000), (1000, 900)])
+    print(f"   diagonal chord curve: {len(detector.grid)} grid cells")
+    assert len(detector.grid) < 2000, f"{len(detector.grid)} cells for three segments"
+
+    print(f"✅ Grid lookup matches the pairwise check on {checked} segments "
+          f"and batch queries match it on {batches} curves!")
+
+except Exception as e:
+    print(f"❌ Test failed: {e}")
+    sys.exit(1)
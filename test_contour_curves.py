@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Contour engine check: for a fixed seed, iter_contour_curves yields
+num_curves simple curves, curve k lying about k * distance inside the
+circle
+"""
+
+import math
+import random
+import sys
+
+try:
+    from atpoe.core.contour import iter_contour_curves
+    from atpoe.core.validation import find_self_intersections
+
+    canvas_size = 1000
+    radius = 450
+    num_curves = 30
+    distance = 10
+    error = 3.0
+    segment_length = 3
+    center = canvas_size / 2
+
+    curves = list(iter_contour_curves(num_curves, distance, error, segment_length,
+                                      canvas_size=canvas_size, radius=radius, rng=random.Random(7)))
+    assert len(curves) == num_curves, f"expected {num_curves} curves, got {len(curves)}"
+
+    # The noise moves a level by at most error; sampling the field on a grid
+    # segment_length apart adds up to about one grid step
+    tolerance = error + segment_length
+    for k, curve in enumerate(curves):
+        radii = [math.hypot(x - center, y - center) for x, y in curve]
+        expected = radius - k * distance
+        worst = max(abs(r - expected) for r in radii)
+        assert worst <= tolerance, f"curve {k}: {worst:.2f} px from radius {expected} (tolerance {tolerance})"
+        crossings = find_self_intersections(curve)
+        assert not crossings, f"curve {k}: crosses itself at {len(crossings)} segment pairs"
+        if k % 10 == 0:
+            print(f"   curve {k}: {len(curve)} points, radius {min(radii):.1f}-{max(radii):.1f} (expected {expected})")
+
+    print(f"✅ {len(curves)} contour curves at their levels without crossings!")
+
+except Exception as e:
+    print(f"❌ Test failed: {e}")
+    sys.exit(1)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Curve cache check: a 60-curve run resumed from a cached 40-curve run
+reproduces a fresh 60-curve run, generating only the missing curves, and
+falls back to an earlier checkpoint when entries have been evicted
+"""
+
+import random
+import sys
+import tempfile
+
+try:
+    import numpy as np
+    from atpoe.core.cache import CurveCache, resume_curves, run_params
+    from atpoe.core.curve_generator import generate_initial_circle, generate_nested_curve, iter_nested_curves
+
+    SEED = 7
+    run = run_params(generate_nested_curve, 1000, 450, 3, 6, 1.5, SEED)
+    generated = []
+
+    def first_curve():
+        return generate_initial_circle(1000, 450, 3)
+
+    def next_curve(curve, rng):
+        generated.append(curve)
+        return generate_nested_curve(curve, 6, 1.5, 3, rng=rng)
+
+    def cached_run(cache, num_curves):
+        """Return the run's curves and how many of them were generated."""
+        generated.clear()
+        curves = list(resume_curves(cache, run, num_curves, first_curve, next_curve, random.Random(SEED)))
+        return curves, len(generated)
+
+    def same_curves(first, second):
+        return len(first) == len(second) and all(np.array_equal(a, b) for a, b in zip(first, second))
+
+    fresh = list(iter_nested_curves(60, 6, 1.5, 3, rng=random.Random(SEED)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CurveCache(tmp)
+        curves, count = cached_run(cache, 40)
+        assert same_curves(curves, fresh[:40]), "40-curve cached run differs from a fresh run"
+
+        # Curves 0-39 and the RNG state after curve 39 are read back
+        curves, count = cached_run(cache, 60)
+        assert same_curves(curves, fresh), "resumed 60-curve run differs from a fresh run"
+        assert count == 20, f"resumed run generated {count} curves, expected 20"
+
+        # Without the checkpoint after curve 59, the run resumes after curve 58
+        cache._path(cache.state_key(run, 59), '.bin').unlink()
+        curves, count = cached_run(cache, 60)
+        assert same_curves(curves, fresh), "run resumed from an earlier checkpoint differs"
+        assert count == 1, f"run without the last checkpoint generated {count} curves, expected 1"
+
+        # Without curve 30, only curves 0-29 are read back
+        cache._path(cache.curve_key(run, 30), '.npy').unlink()
+        curves, count = cached_run(cache, 60)
+        assert same_curves(curves, fresh), "run resumed before an evicted curve differs"
+        assert count == 30, f"run without curve 30 generated {count} curves, expected 30"
+
+        # Evicting everything regenerates the run from the start
+        cache.clear()
+        curves, count = cached_run(cache, 60)
+        assert same_curves(curves, fresh), "run regenerated after eviction differs"
+        assert count == 59, f"run after eviction generated {count} curves, expected 59"
+
+    print("✅ Cached runs resume correctly!")
+
+except Exception as e:
+    print(f"❌ Test failed: {e}")
+    sys.exit(1)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Curve file round-trip check: curves and run parameters saved with
+save_curves read back unchanged through CurveFile and load_curves
+"""
+
+import os
+import sys
+import tempfile
+
+try:
+    import numpy as np
+    from atpoe.core.curve_generator import generate_initial_circle, generate_nested_curve
+    from atpoe.core.storage import CurveFile, load_curves, save_curves
+    
+    # A short run of curves with different point counts
+    curves = [generate_initial_circle(1000, 450)]
+    for i in range(4):
+        curves.append(generate_nested_curve(curves[-1], 15, 2.4))
+    params = {'dist': 15, 'segment_length': 3, 'error': 2.4, 'seed': None}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'run.atpc')
+        save_curves(path, curves, params)
+        
+        # float64 curves read back bit for bit, with their parameters
+        loaded = load_curves(path)
+        assert len(loaded) == len(curves), f"{len(loaded)} curves read back, {len(curves)} saved"
+        for saved, curve in zip(curves, loaded):
+            assert np.array_equal(np.asarray(saved), curve), "curve changed on the round trip"
+        
+        curve_file = CurveFile(path)
+        assert curve_file.params == params, f"params changed: {curve_file.params}"
+        assert curve_file.point_counts() == [len(curve) for curve in curves]
+        assert np.array_equal(curve_file[3], np.asarray(curves[3])), "random access to curve 3 differs"
+        # Release the memory map before the directory is removed
+        del curve_file
+        
+        # float32 files keep every point to float32 precision
+        path32 = os.path.join(tmp, 'run32.atpc')
+        save_curves(path32, curves, params, dtype='float32')
+        for saved, curve in zip(curves, load_curves(path32)):
+            assert np.allclose(np.asarray(saved), curve, atol=1e-3), "float32 curve changed"
+    
+    print("✅ Curve file round trip successful!")
+    print(f"   {len(curves)} curves, {sum(len(curve) for curve in curves)} points")
+    
+except Exception as e:
+    print(f"❌ Test failed: {e}")
+    sys.exit(1)
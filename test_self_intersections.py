@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Self-intersection check: the sweep line in atpoe.core.validation finds
+exactly the crossing segment pairs that testing every pair with
+do_lines_intersect finds
+"""
+
+import math
+import random
+import sys
+
+try:
+    from atpoe.core.curve_generator import do_lines_intersect, generate_initial_circle, iter_nested_curves
+    from atpoe.core.validation import find_self_intersections, is_simple_curve
+
+    def brute_force_intersections(curve):
+        """Test every pair of segments that are not neighbours along the curve."""
+        n = len(curve)
+        segments = [i for i in range(n) if curve[i] != curve[(i + 1) % n]]
+        if len(segments) < 4:
+            return []
+        pairs = []
+        for a in range(len(segments)):
+            for b in range(a + 2, len(segments)):
+                if a == 0 and b == len(segments) - 1:
+                    continue
+                i, j = segments[a], segments[b]
+                if do_lines_intersect(curve[i], curve[(i + 1) % n], curve[j], curve[(j + 1) % n]):
+                    pairs.append((i, j))
+        return pairs
+
+    rng = random.Random(5)
+    circle = generate_initial_circle(1000, 450, 15)
+    curves = {
+        'circle': circle,
+        'nested curve': list(iter_nested_curves(12, 15, 2.4, 15, rng=random.Random(1)))[-1],
+        'figure eight': [(500 + 300 * math.sin(2 * t), 500 + 300 * math.sin(t))
+                         for t in (2 * math.pi * k / 160 for k in range(160))],
+        'repeated closing point': circle + [circle[0]],
+    }
+    for k in range(5):
+        # Rough circles with large errors cross themselves in many places
+        curves[f'rough circle {k}'] = [(500 + (300 + rng.uniform(-60, 60)) * math.cos(t),
+                                        500 + (300 + rng.uniform(-60, 60)) * math.sin(t))
+                                       for t in (2 * math.pi * j / 200 for j in range(200))]
+
+    for name, curve in curves.items():
+        expected = brute_force_intersections(curve)
+        found = find_self_intersections(curve)
+        assert found == expected, f"{name}: sweep found {len(found)} crossings, pair scan {len(expected)}"
+        assert is_simple_curve(curve) == (not expected), f"{name}: is_simple_curve disagrees"
+        print(f"   {name}: {len(curve)} points, {len(found)} crossings")
+
+    print("✅ Sweep line matches the pairwise check!")
+
+except Exception as e:
+    print(f"❌ Test failed: {e}")
+    sys.exit(1)